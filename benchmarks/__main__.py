@@ -0,0 +1,88 @@
+import argparse
+import json
+from pathlib import (
+    Path,
+)
+import sys
+from typing import (
+    Dict,
+    List,
+)
+
+from benchmarks.corpora import (
+    CORPORA,
+)
+from benchmarks.suite import (
+    BENCHMARKS,
+    run_benchmark,
+)
+
+DEFAULT_BASELINE_PATH = Path(__file__).parent / 'baseline.json'
+
+
+def main(argv: List[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Benchmark py-lll on synthetic corpora.',
+    )
+    parser.add_argument(
+        '-b', '--benchmark', action='append', choices=sorted(BENCHMARKS),
+        help='benchmark to run (default: all)',
+    )
+    parser.add_argument(
+        '-c', '--corpus', action='append', choices=sorted(CORPORA),
+        help='corpus to benchmark on (default: all)',
+    )
+    parser.add_argument(
+        '--size', type=int, default=1000000,
+        help='approximate size of each corpus in characters (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=5,
+        help='number of timed runs of each benchmark (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--save', type=Path, metavar='PATH',
+        help='save results as a baseline to PATH',
+    )
+    parser.add_argument(
+        '--compare', type=Path, metavar='PATH', default=DEFAULT_BASELINE_PATH,
+        help='compare results with the baseline at PATH if it exists (default: %(default)s)',
+    )
+    args = parser.parse_args(argv)
+
+    baseline: Dict[str, Dict[str, float]] = {}
+    if args.compare.exists():
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+
+    results = {}
+
+    print(f'{"benchmark":<32} {"MB/s":>8} {"forms/s":>12} {"peak MB":>9} {"vs base":>8}')
+
+    for corpus_name in args.corpus or sorted(CORPORA):
+        source_code = CORPORA[corpus_name](args.size)
+
+        for benchmark_name in args.benchmark or sorted(BENCHMARKS):
+            name = f'{benchmark_name}/{corpus_name}'
+            result = run_benchmark(BENCHMARKS[benchmark_name], source_code, args.repeat)
+            results[name] = result._asdict()
+
+            if name in baseline:
+                change = f'{baseline[name]["seconds"] / result.seconds:.2f}x'
+            else:
+                change = '-'
+
+            print(
+                f'{name:<32} {result.mb_per_sec:>8.2f} {result.forms_per_sec:>12,.0f} '
+                f'{result.peak_memory / 1e6:>9.2f} {change:>8}'
+            )
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
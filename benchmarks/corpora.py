@@ -0,0 +1,131 @@
+from pathlib import (
+    Path,
+)
+import random
+from typing import (
+    Callable,
+    Dict,
+    List,
+)
+
+FIXTURES_PATH = Path(__file__).parent.parent / 'tests' / 'fixtures'
+
+SYMBOLS = (
+    'seq', 'def', 'when', 'unless', 'if', 'mstore', 'mload', 'sstore', 'sload',
+    'calldataload', 'return', 'add', 'sub', 'mul', 'div', 'eq', 'lt', 'gt',
+    'caller', 'callvalue', 'node-bytes', 'label-bytes', 'get-node-owner',
+)
+
+
+def _repeat_to_size(source_code: str, size: int) -> str:
+    return source_code * max(1, size // len(source_code))
+
+
+def make_ens(size: int) -> str:
+    """
+    The ENS registry fixture repeated.
+    """
+    with open(FIXTURES_PATH / 'ENS.lll.lisp', 'r') as f:
+        return _repeat_to_size(f.read(), size)
+
+
+def make_wide(size: int) -> str:
+    """
+    Many short top-level forms.
+    """
+    rng = random.Random(0)
+    lines: List[str] = []
+    length = 0
+
+    while length < size:
+        args = ' '.join(rng.choice(SYMBOLS) for _ in range(rng.randint(1, 4)))
+        line = f'({rng.choice(SYMBOLS)} {args} {rng.randint(0, 0xffff)})\n'
+
+        lines.append(line)
+        length += len(line)
+
+    return ''.join(lines)
+
+
+def make_deep(size: int) -> str:
+    """
+    Deeply nested forms.
+    """
+    form = '(seq ' * 10000 + '0x00' + ')' * 10000 + '\n'
+
+    return _repeat_to_size(form, size)
+
+
+def make_strings(size: int) -> str:
+    """
+    Forms dominated by string literals, including escape sequences and
+    newlines.
+    """
+    rng = random.Random(0)
+    words = ('foo', 'bar', 'baz', 'quux', '\\"quoted\\"', 'tab\\t', 'newline\\n', 'back\\\\slash')
+    lines: List[str] = []
+    length = 0
+
+    while length < size:
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(4, 40)))
+        if rng.random() < 0.1:
+            text += '\nspanning lines'
+        line = f'(log "{text}" "{rng.choice(words)}")\n'
+
+        lines.append(line)
+        length += len(line)
+
+    return ''.join(lines)
+
+
+def make_comments(size: int) -> str:
+    """
+    Forms dominated by comments.
+    """
+    rng = random.Random(0)
+    lines: List[str] = []
+    length = 0
+
+    while length < size:
+        line = ';; ' + ' '.join(rng.choice(SYMBOLS) for _ in range(rng.randint(2, 12))) + '\n'
+        if rng.random() < 0.2:
+            line += f'(def \'{rng.choice(SYMBOLS)} 0x{rng.randint(0, 0xff):02x}) ; (ignored)\n'
+
+        lines.append(line)
+        length += len(line)
+
+    return ''.join(lines)
+
+
+def make_numbers(size: int) -> str:
+    """
+    Forms dominated by int literals in every supported base.
+    """
+    rng = random.Random(0)
+    formats = ('{}', '-{}', '0x{:x}', '-0x{:x}', '0o{:o}', '0b{:b}', '0x{:064x}')
+    lines: List[str] = []
+    length = 0
+
+    while length < size:
+        literals = ' '.join(
+            rng.choice(formats).format(rng.randint(0, 2 ** rng.choice((8, 32, 256))))
+            for _ in range(rng.randint(4, 16))
+        )
+        line = f'(data {literals})\n'
+
+        lines.append(line)
+        length += len(line)
+
+    return ''.join(lines)
+
+
+# Generators of deterministic source code of roughly the given size in
+# characters
+CORPORA: Dict[str, Callable[[int], str]] = {
+    'ens': make_ens,
+    'wide': make_wide,
+    'deep': make_deep,
+    'strings': make_strings,
+    'comments': make_comments,
+    'numbers': make_numbers,
+}
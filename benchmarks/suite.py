@@ -0,0 +1,115 @@
+import functools
+import io
+import time
+import tracemalloc
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+)
+
+from lll.exceptions import (
+    ParseError,
+)
+from lll.parser import (
+    SExprList,
+    iter_parse,
+    iter_s_exps,
+    parse_s_exp,
+    select_s_exps,
+    validate,
+)
+from lll.printer import (
+    dumps,
+)
+
+
+class BenchmarkResult(NamedTuple):
+    seconds: float
+    mb_per_sec: float
+    forms_per_sec: float
+    peak_memory: int
+
+
+def count_forms(s_exp: SExprList) -> int:
+    """
+    Return the number of lists in a parsed s-expression, not counting the
+    top-level list.
+    """
+    count = 0
+    stack = [s_exp]
+
+    while stack:
+        for item in stack.pop():
+            if isinstance(item, list):
+                count += 1
+                stack.append(item)
+
+    return count
+
+
+@functools.lru_cache(maxsize=1)
+def _append_error(source_code: str) -> str:
+    return source_code + '\n(unclosed'
+
+
+def parse_error(source_code: str) -> None:
+    """
+    Parse source code with an error at its end, as when validating files which
+    are often broken.
+    """
+    try:
+        parse_s_exp(_append_error(source_code))
+    except ParseError:
+        pass
+    else:
+        raise Exception('Unreachable')
+
+
+# Functions which are benchmarked on the source code of each corpus
+BENCHMARKS: Dict[str, Callable[[str], Any]] = {
+    'parse_s_exp': parse_s_exp,
+    'iter_parse': lambda source_code: list(iter_parse(io.StringIO(source_code))),
+    'iter_s_exps': lambda source_code: list(iter_s_exps(source_code)),
+    'round_trip': lambda source_code: dumps(parse_s_exp(source_code)),
+    'parse_error': parse_error,
+    'validate': validate,
+    'select_defs': lambda source_code: select_s_exps(
+        source_code,
+        lambda head, depth: head == 'def',
+        max_depth=2,
+    ),
+}
+
+
+def run_benchmark(func: Callable[[str], Any],
+                  source_code: str,
+                  repeat: int) -> BenchmarkResult:
+    """
+    Run ``func`` on ``source_code`` and report the best time of ``repeat`` runs
+    along with the peak memory allocated during a separate traced run.
+    """
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(source_code)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func(source_code)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(times)
+    num_forms = count_forms(parse_s_exp(source_code))
+
+    return BenchmarkResult(
+        seconds=seconds,
+        mb_per_sec=len(source_code.encode('utf-8')) / seconds / 1e6,
+        forms_per_sec=num_forms / seconds,
+        peak_memory=peak_memory,
+    )
@@ -0,0 +1,121 @@
+import asyncio
+import codecs
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+)
+from typing import (
+    Any,
+    AsyncIterator,
+    List,
+)
+
+from lll.parser import (
+    DEFAULT_CHUNK_SIZE,
+    ParseLimits,
+    SExprList,
+    SymbolTable,
+    _ChunkParser,
+)
+
+
+async def aiter_s_exps(reader: asyncio.StreamReader,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       symbol_table: SymbolTable = None,
+                       limits: ParseLimits = None,
+                       executor: Executor = None) -> AsyncIterator[Any]:
+    """
+    Incrementally parse the s-expression contained in the utf-8 encoded
+    source code read from an asyncio stream.  The stream is read in chunks of
+    roughly ``chunk_size`` bytes and control is returned to the event loop
+    after each chunk is parsed.
+
+    :param reader: A stream reader, such as one returned by
+        ``asyncio.open_connection``.
+    :param chunk_size: The number of bytes to read and parse at a time.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+    :param limits: Optional limits on the resources used to parse the
+        s-expression.
+    :param executor: An optional executor in which to parse each chunk so
+        that parsing does not block the event loop.  Chunks are parsed one at
+        a time.  The state of the parser is kept between chunks, so the
+        executor must run them in this process, e.g. a thread pool.
+
+    :returns: An async iterator over the top-level items in the parsed
+        s-expression, each of which is yielded once it has been completed.
+    """
+    if isinstance(executor, ProcessPoolExecutor):
+        raise TypeError('executor must run in the current process')
+
+    parser = _ChunkParser(symbol_table, limits=limits)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    loop = asyncio.get_event_loop()
+
+    at_eof = False
+
+    while not at_eof:
+        size = parser.get_read_size(chunk_size)
+
+        # Network streams may return less than requested, so gather reads
+        # until a whole chunk is available
+        parts: List[str] = []
+        length = 0
+
+        while length < size and not at_eof:
+            data = await reader.read(size - length)
+            at_eof = not data
+
+            try:
+                text = decoder.decode(data, final=at_eof)
+            except UnicodeDecodeError as e:
+                parser.raise_decode_error(
+                    ''.join(parts) + e.object[:e.start].decode('utf-8'),
+                    e.object[e.start:].split(b'\n', 1)[0].decode('utf-8', 'replace'),
+                    e.reason,
+                )
+
+            parts.append(text)
+            length += len(text)
+
+        chunk = ''.join(parts)
+        if not chunk:
+            continue
+
+        if executor is None:
+            completed = parser.feed(chunk)
+            await asyncio.sleep(0)
+        else:
+            completed = await loop.run_in_executor(executor, parser.feed, chunk)
+
+        for item in completed:
+            yield item
+
+    for item in parser.close():
+        yield item
+
+
+async def aparse(reader: asyncio.StreamReader,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 symbol_table: SymbolTable = None,
+                 limits: ParseLimits = None,
+                 executor: Executor = None) -> SExprList:
+    """
+    Parse the s-expression contained in the utf-8 encoded source code read
+    from an asyncio stream without blocking the event loop for longer than it
+    takes to parse a chunk.
+
+    :param reader: A stream reader, such as one returned by
+        ``asyncio.open_connection``.
+    :param chunk_size: The number of bytes to read and parse at a time.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+    :param limits: Optional limits on the resources used to parse the
+        s-expression.
+    :param executor: An optional executor in which to parse each chunk,
+        which must run in this process.
+
+    :returns: The python list representation of the parsed s-expression.
+    """
+    return [
+        item
+        async for item in aiter_s_exps(reader, chunk_size, symbol_table, limits, executor)
+    ]
@@ -0,0 +1,78 @@
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    as_completed,
+)
+from pathlib import (
+    Path,
+)
+from typing import (
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Union,
+)
+
+from lll.exceptions import (
+    ParseError,
+)
+from lll.parser import (
+    SExprList,
+    parse_file,
+)
+
+
+class ParseResult(NamedTuple):
+    """
+    The result of parsing a file with ``parse_many``.  Exactly one of
+    ``s_exp`` and ``error`` is ``None``.
+    """
+    path: str
+    s_exp: Optional[SExprList]
+    error: Optional[ParseError]
+
+
+def _parse_path(path: str) -> ParseResult:
+    try:
+        s_exp = parse_file(path)
+    except ParseError as e:
+        return ParseResult(path, None, e)
+
+    return ParseResult(path, s_exp, None)
+
+
+def parse_many(paths: Iterable[Union[str, Path]],
+               workers: int = None,
+               ordered: bool = True,
+               chunksize: int = 1) -> Iterator[ParseResult]:
+    """
+    Parse many files in parallel using a pool of worker processes.  A parse
+    error in one file does not prevent other files from being parsed.
+
+    Parse trees are sent back from workers as pickles, which are compact since
+    symbols that occur several times in a tree are pickled only once.  Parse
+    errors only send back the line of source code on which they occurred.
+
+    :param paths: The paths of the files to parse.
+    :param workers: The number of worker processes to use.  Defaults to the
+        number of processors.  If ``1``, files are parsed in this process.
+    :param ordered: If true, results are yielded in the order of ``paths``.
+        Otherwise, results are yielded as they become available.
+    :param chunksize: The number of files sent to a worker at a time when
+        results are ordered.
+
+    :returns: An iterator over the ``ParseResult`` of each file.
+    """
+    path_strs = [str(path) for path in paths]
+
+    if workers == 1:
+        yield from map(_parse_path, path_strs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if ordered:
+            yield from executor.map(_parse_path, path_strs, chunksize=chunksize)
+        else:
+            futures = [executor.submit(_parse_path, path) for path in path_strs]
+            for future in as_completed(futures):
+                yield future.result()
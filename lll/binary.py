@@ -0,0 +1,370 @@
+from array import (
+    array,
+)
+import itertools
+import sys
+from typing import (
+    Any,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Tuple,
+)
+
+from lll.parser import (
+    SExprList,
+    Symbol,
+    SymbolTable,
+)
+
+
+# Identifies the binary encoding of an s-expression
+MAGIC = b'LLLB'
+
+# Incremented whenever the binary encoding changes
+FORMAT_VERSION = 1
+
+# The number of list delimiters and atoms after which the encoder ends a frame
+FRAME_SIZE = 64 * 1024
+
+# Frame tags
+END = 0
+FRAME = 1
+
+# Atom kinds
+SYMBOL = 0
+STR = 1
+INT = 2
+
+# Codes of the items of the tree.  Codes from ``FIRST_ATOM`` on are indexes
+# into the table of atoms.
+OPEN = 0
+CLOSE = 1
+FIRST_ATOM = 2
+
+# Array typecodes by item size
+ARRAY_TYPECODES = {array(typecode).itemsize: typecode for typecode in 'BHILQ'}
+
+
+def _encode_varint(value: int) -> bytes:
+    """
+    Return the LEB128 encoding of a non-negative int.
+    """
+    result = bytearray()
+
+    while True:
+        byte = value & 0x7f
+        value >>= 7
+
+        if value:
+            result.append(byte | 0x80)
+        else:
+            result.append(byte)
+            return bytes(result)
+
+
+def _read_exactly(stream: BinaryIO, size: int) -> bytes:
+    data = stream.read(size)
+    if len(data) != size:
+        raise ValueError('truncated binary s-expression')
+
+    return data
+
+
+def _read_varint(stream: BinaryIO) -> int:
+    value = 0
+    shift = 0
+
+    while True:
+        byte = _read_exactly(stream, 1)[0]
+        value |= (byte & 0x7f) << shift
+        shift += 7
+
+        if not byte & 0x80:
+            return value
+
+
+def _encode_blob(data: bytes) -> bytes:
+    return _encode_varint(len(data)) + data
+
+
+def _read_blob(stream: BinaryIO) -> bytes:
+    return _read_exactly(stream, _read_varint(stream))
+
+
+def _encode_uint_array(values: List[int]) -> bytes:
+    """
+    Return the encoding of a list of non-negative ints as an array of little
+    endian ints of the smallest size that fits them all.
+    """
+    max_value = max(values, default=0)
+
+    for itemsize in sorted(ARRAY_TYPECODES):
+        if max_value < 1 << (8 * itemsize):
+            break
+    else:
+        raise ValueError('array value out of range')
+
+    arr = array(ARRAY_TYPECODES[itemsize], values)
+    if sys.byteorder == 'big':
+        arr.byteswap()
+
+    return bytes([itemsize]) + _encode_blob(arr.tobytes())
+
+
+def _read_uint_array(stream: BinaryIO) -> 'array[int]':
+    itemsize = _read_exactly(stream, 1)[0]
+
+    try:
+        arr = array(ARRAY_TYPECODES[itemsize])
+    except KeyError:
+        raise ValueError(f'unsupported array item size: {itemsize}') from None
+
+    arr.frombytes(_read_blob(stream))
+    if sys.byteorder == 'big':
+        arr.byteswap()
+
+    return arr
+
+
+class _FrameWriter:
+    """
+    Collects the codes and new atoms of a frame of an encoded s-expression.
+    """
+    __slots__ = ('codes', 'kinds', 'symbols', 'strs', 'ints')
+
+    codes: List[int]
+    kinds: List[int]
+    symbols: List[str]
+    strs: List[str]
+    ints: List[int]
+
+    def __init__(self) -> None:
+        self.codes = []
+        self.kinds = []
+        self.symbols = []
+        self.strs = []
+        self.ints = []
+
+    def add_atom(self, kind: int, value: Any) -> None:
+        self.kinds.append(kind)
+
+        if kind == SYMBOL:
+            # Symbols are separated by newlines
+            if not value or '\n' in value:
+                raise ValueError(f'symbol cannot be encoded: {repr(value)}')
+            self.symbols.append(value)
+        elif kind == STR:
+            self.strs.append(value)
+        else:
+            self.ints.append(value)
+
+    def to_bytes(self) -> bytes:
+        strs = [value.encode('utf-8') for value in self.strs]
+
+        return b''.join((
+            bytes([FRAME]),
+            _encode_blob(bytes(self.kinds)),
+            _encode_blob('\n'.join(self.symbols).encode('utf-8')),
+            _encode_uint_array([len(value) for value in strs]),
+            _encode_blob(b''.join(strs)),
+            _encode_blob(' '.join(format(value, 'x') for value in self.ints).encode('ascii')),
+            _encode_uint_array(self.codes),
+        ))
+
+
+def encode(s_exp: SExprList, stream: BinaryIO) -> None:
+    """
+    Write the binary encoding of a parsed s-expression to a binary stream.
+
+    The encoding is a header followed by a series of frames, each of which
+    holds the atoms first used in the frame and a flat array of codes for a
+    run of list delimiters and atoms.  Atoms are written once and referred to
+    by index thereafter.
+
+    :param s_exp: The python list representation of an s-expression.
+    :param stream: A writable binary stream.
+    """
+    stream.write(MAGIC + _encode_varint(FORMAT_VERSION))
+
+    # Indexes of atoms by kind, since symbols and strings compare equal
+    symbol_indexes: Dict[str, int] = {}
+    str_indexes: Dict[str, int] = {}
+    int_indexes: Dict[int, int] = {}
+    next_index = FIRST_ATOM
+
+    frame = _FrameWriter()
+    codes = frame.codes
+    append = codes.append
+
+    stack = [iter(s_exp)]
+
+    while stack:
+        if len(codes) >= FRAME_SIZE:
+            stream.write(frame.to_bytes())
+            frame = _FrameWriter()
+            codes = frame.codes
+            append = codes.append
+
+        for item in stack[-1]:
+            if isinstance(item, list):
+                append(OPEN)
+                stack.append(iter(item))
+                break
+
+            if isinstance(item, Symbol):
+                index = symbol_indexes.get(item)
+                if index is None:
+                    index = symbol_indexes[item] = next_index
+                    next_index += 1
+                    frame.add_atom(SYMBOL, item)
+
+            elif isinstance(item, str):
+                index = str_indexes.get(item)
+                if index is None:
+                    index = str_indexes[item] = next_index
+                    next_index += 1
+                    frame.add_atom(STR, item)
+
+            elif isinstance(item, int):
+                index = int_indexes.get(item)
+                if index is None:
+                    index = int_indexes[item] = next_index
+                    next_index += 1
+                    frame.add_atom(INT, item)
+
+            else:
+                raise TypeError(f'unsupported s-expression item: {repr(item)}')
+
+            append(index)
+
+        else:
+            stack.pop()
+            if stack:
+                append(CLOSE)
+
+    if codes:
+        stream.write(frame.to_bytes())
+
+    stream.write(bytes([END]))
+
+
+def _read_header(stream: BinaryIO) -> None:
+    if stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError('not a binary s-expression')
+
+    version = _read_varint(stream)
+    if version != FORMAT_VERSION:
+        raise ValueError(f'unsupported binary s-expression version: {version}')
+
+
+def _read_atoms(stream: BinaryIO, make_symbol: Callable[[str], Symbol]) -> List[Any]:
+    """
+    Read the atoms first used in a frame in the order of their indexes.
+    """
+    kinds = _read_blob(stream)
+
+    symbols_data = _read_blob(stream).decode('utf-8')
+    symbols = map(make_symbol, symbols_data.split('\n')) if symbols_data else iter(())
+
+    str_sizes = _read_uint_array(stream)
+    strs_data = _read_blob(stream)
+
+    str_offsets = [0]
+    for size in str_sizes:
+        str_offsets.append(str_offsets[-1] + size)
+    strs = (
+        strs_data[start:end].decode('utf-8')
+        for start, end in zip(str_offsets, str_offsets[1:])
+    )
+
+    ints = map(int, _read_blob(stream).split(), itertools.repeat(16))
+
+    atom_iters = (symbols, strs, ints)
+    try:
+        return [next(atom_iters[kind]) for kind in kinds]
+    except (IndexError, StopIteration):
+        raise ValueError('invalid binary s-expression atoms') from None
+
+
+def _iter_frames(stream: BinaryIO,
+                 symbol_table: SymbolTable = None) -> Iterator[Tuple[List[Any], 'array[int]']]:
+    """
+    Iterate over the table of atoms, which grows with each frame, and the
+    codes of each frame of an encoded s-expression.
+    """
+    make_symbol = Symbol if symbol_table is None else symbol_table.intern
+
+    _read_header(stream)
+
+    # Codes of atoms index directly into the table
+    atoms: List[Any] = [None] * FIRST_ATOM
+
+    while True:
+        tag = _read_exactly(stream, 1)[0]
+
+        if tag == END:
+            return
+        elif tag != FRAME:
+            raise ValueError(f'invalid binary s-expression frame tag: {tag}')
+
+        atoms.extend(_read_atoms(stream, make_symbol))
+
+        yield atoms, _read_uint_array(stream)
+
+
+def iter_decode(stream: BinaryIO, symbol_table: SymbolTable = None) -> Iterator[Any]:
+    """
+    Incrementally decode a binary encoded s-expression.  The stream is read a
+    frame at a time and only the incomplete top-level item is held between
+    frames.
+
+    :param stream: A readable binary stream containing an s-expression written
+        by ``encode``.
+    :param symbol_table: An optional table in which to intern decoded symbols.
+
+    :returns: An iterator over the top-level items of the s-expression, each of
+        which is yielded once it has been completed.
+    """
+    top: SExprList = []
+    append = top.append
+    stack: List[Callable[[Any], None]] = []
+
+    for atoms, codes in _iter_frames(stream, symbol_table):
+        try:
+            for code in codes:
+                if code >= FIRST_ATOM:
+                    append(atoms[code])
+                elif code == OPEN:
+                    new: SExprList = []
+                    append(new)
+                    stack.append(append)
+                    append = new.append
+                else:
+                    append = stack.pop()
+        except IndexError:
+            raise ValueError('invalid binary s-expression codes') from None
+
+        # The last top-level item is incomplete if any list is open
+        num_completed = len(top) - 1 if stack else len(top)
+
+        yield from top[:num_completed]
+        del top[:num_completed]
+
+    if stack:
+        raise ValueError('truncated binary s-expression')
+
+
+def decode(stream: BinaryIO, symbol_table: SymbolTable = None) -> SExprList:
+    """
+    Decode a binary encoded s-expression.
+
+    :param stream: A readable binary stream containing an s-expression written
+        by ``encode``.
+    :param symbol_table: An optional table in which to intern decoded symbols.
+
+    :returns: The python list representation of the s-expression.
+    """
+    return list(iter_decode(stream, symbol_table))
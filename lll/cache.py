@@ -0,0 +1,332 @@
+import collections
+import hashlib
+import os
+from pathlib import (
+    Path,
+)
+import pickle
+import sys
+import tempfile
+from typing import (
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from lll.compact import (
+    get_s_exp_nbytes,
+)
+from lll.parser import (
+    PARSER_VERSION,
+    BytesLike,
+    ParseBuffer,
+    SExprList,
+    parse_s_exp,
+)
+
+
+# Incremented whenever the format of cache files changes
+CACHE_FORMAT_VERSION = 1
+
+CACHE_FILE_SUFFIX = '.lllc'
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# When an added entry grows a cache beyond its maximum size, entries are
+# evicted until the cache is at most this fraction of its maximum size so that
+# the cache directory is only scanned once many more entries have been added
+EVICT_TO_FRACTION = 0.75
+
+DEFAULT_MAX_ENTRIES = 1024
+
+
+class ParseCache:
+    """
+    A persistent cache of parsed s-expressions which is stored as files in a
+    directory.  Entries are keyed by a hash of their source code and of the
+    parser version.  When the total size of the cache files exceeds
+    ``max_size`` bytes, the least recently used entries are evicted.  The
+    total size is only found by scanning the cache directory once the sizes of
+    the entries added since the last scan may have exceeded ``max_size``.
+
+    Any number of processes may share a cache directory.  Entries are written
+    atomically, and entries which are missing, unreadable or evicted by another
+    process are treated as misses.  Since entries are stored as pickles, the
+    cache directory must only be writable by trusted users.
+    """
+    cache_dir: Path
+    max_size: int
+
+    _size_estimate: Optional[int]
+
+    def __init__(self,
+                 cache_dir: Union[str, Path],
+                 max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = Path(cache_dir)
+        self.max_size = max_size
+
+        # Total size of the cache files as of the last scan plus the sizes of
+        # the entries added since.  Entries added by other processes are only
+        # counted by the next scan.
+        self._size_estimate = None
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def get_key(source_code: str) -> str:
+        """
+        Return the key of the cache entry for the given source code.
+        """
+        h = hashlib.sha256(f'{CACHE_FORMAT_VERSION}:{PARSER_VERSION}:'.encode('ascii'))
+        h.update(source_code.encode('utf-8', 'surrogatepass'))
+
+        return h.hexdigest()
+
+    def _get_path(self, key: str) -> Path:
+        return self.cache_dir / (key + CACHE_FILE_SUFFIX)
+
+    def get(self, source_code: str) -> Optional[SExprList]:
+        """
+        Return the cached parse of the given source code or ``None`` if it is
+        not in the cache.
+        """
+        path = self._get_path(self.get_key(source_code))
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        try:
+            s_exp = pickle.loads(data)
+        except Exception:
+            s_exp = None
+
+        if not isinstance(s_exp, list):
+            # Discard corrupted entries
+            self._remove(path)
+            return None
+
+        # Mark the entry as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        return s_exp
+
+    def put(self, source_code: str, s_exp: SExprList) -> None:
+        """
+        Add the parse of the given source code to the cache and evict entries
+        if the cache has grown too large.
+        """
+        path = self._get_path(self.get_key(source_code))
+        data = pickle.dumps(s_exp, protocol=pickle.HIGHEST_PROTOCOL)
+
+        # Write to a temporary file first so that other processes never see a
+        # partially written entry
+        fd, tmp_name = tempfile.mkstemp(dir=str(self.cache_dir), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_name, str(path))
+        except BaseException:
+            self._remove(Path(tmp_name))
+            raise
+
+        size_estimate = self._size_estimate
+        if size_estimate is not None:
+            size_estimate += len(data)
+            self._size_estimate = size_estimate
+
+        if size_estimate is None or size_estimate > self.max_size:
+            self._evict(int(self.max_size * EVICT_TO_FRACTION))
+
+    def parse(self, str_or_buffer: Union[str, TextIO, BytesLike]) -> SExprList:
+        """
+        Parse the s-expression contained in a string or text buffer, using the
+        cached parse if there is one.
+        """
+        source_code = ParseBuffer(str_or_buffer).source_code
+
+        s_exp = self.get(source_code)
+        if s_exp is None:
+            s_exp = parse_s_exp(source_code)
+            self.put(source_code, s_exp)
+
+        return s_exp
+
+    def _get_entries(self) -> List[Tuple[float, int, Path]]:
+        entries = []
+
+        for path in self.cache_dir.glob('*' + CACHE_FILE_SUFFIX):
+            try:
+                stat = path.stat()
+            except OSError:
+                # Entry was evicted by another process
+                continue
+
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        return entries
+
+    def get_size(self) -> int:
+        """
+        Return the total size in bytes of the cache files.
+        """
+        return sum(size for _, size, _ in self._get_entries())
+
+    def evict(self) -> None:
+        """
+        Evict the least recently used entries until the total size of the cache
+        files is at most ``max_size`` bytes.
+        """
+        self._evict(self.max_size)
+
+    def _evict(self, target_size: int) -> None:
+        """
+        Evict the least recently used entries, if the total size of the cache
+        files exceeds ``max_size`` bytes, until it is at most ``target_size``
+        bytes.
+        """
+        entries = self._get_entries()
+        total_size = sum(size for _, size, _ in entries)
+
+        if total_size > self.max_size:
+            for _, size, path in sorted(entries):
+                if total_size <= target_size:
+                    break
+
+                self._remove(path)
+                total_size -= size
+
+        self._size_estimate = total_size
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.
+        """
+        for _, _, path in self._get_entries():
+            self._remove(path)
+
+        self._size_estimate = 0
+
+    @staticmethod
+    def _remove(path: Path) -> None:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def copy_s_exp(s_exp: SExprList) -> SExprList:
+    """
+    Return a copy of the python list representation of a parsed s-expression.
+    All lists are copied and atoms, which are immutable, are shared.
+    """
+    result: SExprList = []
+    stack = [(s_exp, result)]
+
+    while stack:
+        source, target = stack.pop()
+
+        for item in source:
+            if isinstance(item, list):
+                copy: SExprList = []
+                target.append(copy)
+                stack.append((item, copy))
+            else:
+                target.append(item)
+
+    return result
+
+
+class CachedParser:
+    """
+    A parser which keeps the most recently parsed source code and parse trees
+    in memory.  The cache holds at most ``max_entries`` entries and, if
+    ``max_bytes`` is given, entries using at most approximately that many
+    bytes.  The least recently used entries are evicted first.
+
+    Each call to ``parse`` returns a new copy of the cached tree so that
+    callers cannot modify the cache.
+    """
+    max_entries: int
+    max_bytes: Optional[int]
+
+    hits: int
+    misses: int
+    evictions: int
+    nbytes: int
+
+    _entries: 'collections.OrderedDict[str, Tuple[SExprList, int]]'
+
+    def __init__(self,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_bytes: int = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # Approximate size of the cached entries
+        self.nbytes = 0
+
+        self._entries = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def parse(self, str_or_buffer: Union[str, TextIO, BytesLike]) -> SExprList:
+        """
+        Parse the s-expression contained in a string or text buffer, using the
+        cached parse if there is one.
+        """
+        source_code = ParseBuffer(str_or_buffer).source_code
+
+        try:
+            s_exp, _ = self._entries[source_code]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            self._entries.move_to_end(source_code)
+
+            return copy_s_exp(s_exp)
+
+        self.misses += 1
+
+        s_exp = parse_s_exp(source_code)
+        size = sys.getsizeof(source_code) + get_s_exp_nbytes(s_exp)
+
+        if self.max_bytes is None or size <= self.max_bytes:
+            self._entries[source_code] = (s_exp, size)
+            self.nbytes += size
+            self._evict()
+
+            return copy_s_exp(s_exp)
+
+        return s_exp
+
+    def _evict(self) -> None:
+        entries = self._entries
+
+        while len(entries) > self.max_entries or (
+            self.max_bytes is not None and self.nbytes > self.max_bytes
+        ):
+            _, (_, size) = entries.popitem(last=False)
+
+            self.nbytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Remove all entries from the cache.  Statistics are not reset.
+        """
+        self._entries.clear()
+        self.nbytes = 0
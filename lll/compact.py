@@ -0,0 +1,206 @@
+from array import (
+    array,
+)
+import collections
+import sys
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    Tuple,
+)
+
+from lll.parser import (
+    SExprList,
+    Symbol,
+)
+
+
+# Node kinds
+LIST = 0
+INT = 1
+STR = 2
+SYMBOL = 3
+
+
+class CompactTree:
+    """
+    A flat, array-backed representation of a parsed s-expression.
+
+    Nodes are numbered in breadth-first order so that the children of each list
+    node occupy a contiguous range of node numbers.  For each node, ``kinds``
+    gives its kind and ``indexes`` gives an index into ``ints``, ``strs`` or
+    ``symbols`` for atoms or a list number for lists.  The children of list
+    number ``k`` are the nodes from ``child_offsets[k]`` up to
+    ``child_offsets[k + 1]``.  List number 0 is the top-level list of the
+    s-expression, which has no node of its own.
+
+    Atoms are interned so that each distinct value is stored once.
+    """
+    __slots__ = ('kinds', 'indexes', 'child_offsets', 'ints', 'strs', 'symbols')
+
+    kinds: 'array[int]'
+    indexes: 'array[int]'
+    child_offsets: 'array[int]'
+
+    ints: List[int]
+    strs: List[str]
+    symbols: List[Symbol]
+
+    def __init__(self) -> None:
+        self.kinds = array('B')
+        self.indexes = array('l')
+        self.child_offsets = array('l')
+
+        self.ints = []
+        self.strs = []
+        self.symbols = []
+
+    @classmethod
+    def from_s_exp(cls, s_exp: SExprList) -> 'CompactTree':
+        """
+        Build a compact tree from the python list representation of a parsed
+        s-expression.
+        """
+        tree = cls()
+
+        kinds = tree.kinds
+        indexes = tree.indexes
+        child_offsets = tree.child_offsets
+
+        # Map atom values to their indexes in the atom tables.  Symbols are
+        # keyed separately from strings since the two compare equal.
+        atom_indexes: Dict[Tuple[int, Any], int] = {}
+        atom_tables: Dict[int, List[Any]] = {INT: tree.ints, STR: tree.strs, SYMBOL: tree.symbols}
+
+        queue: Deque[SExprList] = collections.deque([s_exp])
+        num_lists = 1
+
+        while queue:
+            child_offsets.append(len(kinds))
+
+            for item in queue.popleft():
+                if isinstance(item, list):
+                    kind = LIST
+                    index = num_lists
+                    num_lists += 1
+                    queue.append(item)
+                else:
+                    if isinstance(item, Symbol):
+                        kind = SYMBOL
+                    elif isinstance(item, str):
+                        kind = STR
+                    elif isinstance(item, int):
+                        kind = INT
+                    else:
+                        raise TypeError(f'unsupported s-expression item: {repr(item)}')
+
+                    key = (kind, item)
+                    try:
+                        index = atom_indexes[key]
+                    except KeyError:
+                        table = atom_tables[kind]
+                        index = atom_indexes[key] = len(table)
+                        table.append(item)
+
+                kinds.append(kind)
+                indexes.append(index)
+
+        child_offsets.append(len(kinds))
+
+        return tree
+
+    def to_s_exp(self) -> SExprList:
+        """
+        Return the python list representation of the s-expression.
+        """
+        kinds = self.kinds
+        indexes = self.indexes
+        child_offsets = self.child_offsets
+
+        lists: List[SExprList] = [[] for _ in range(len(child_offsets) - 1)]
+        atom_tables: Dict[int, List[Any]] = {INT: self.ints, STR: self.strs, SYMBOL: self.symbols}
+
+        for list_no, result in enumerate(lists):
+            for node in range(child_offsets[list_no], child_offsets[list_no + 1]):
+                kind = kinds[node]
+
+                if kind == LIST:
+                    result.append(lists[indexes[node]])
+                else:
+                    result.append(atom_tables[kind][indexes[node]])
+
+        return lists[0]
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def get_children(self, node: int = None) -> range:
+        """
+        Return the range of node numbers of the children of the list node
+        ``node`` or of the top-level list if ``node`` is ``None``.
+        """
+        if node is None:
+            list_no = 0
+        elif self.kinds[node] == LIST:
+            list_no = self.indexes[node]
+        else:
+            raise ValueError(f'node {node} is not a list')
+
+        return range(self.child_offsets[list_no], self.child_offsets[list_no + 1])
+
+    def get_value(self, node: int) -> Any:
+        """
+        Return the value of the atom node ``node``.
+        """
+        kind = self.kinds[node]
+
+        if kind == INT:
+            return self.ints[self.indexes[node]]
+        elif kind == STR:
+            return self.strs[self.indexes[node]]
+        elif kind == SYMBOL:
+            return self.symbols[self.indexes[node]]
+        else:
+            raise ValueError(f'node {node} is not an atom')
+
+    @property
+    def nbytes(self) -> int:
+        """
+        The approximate number of bytes of memory used by the tree, including
+        its atom tables.
+        """
+        size = sys.getsizeof(self)
+
+        for arr in (self.kinds, self.indexes, self.child_offsets):
+            size += sys.getsizeof(arr)
+
+        for table in (self.ints, self.strs, self.symbols):
+            size += sys.getsizeof(table) + sum(sys.getsizeof(atom) for atom in table)
+
+        return size
+
+
+def get_s_exp_nbytes(s_exp: SExprList) -> int:
+    """
+    Return the approximate number of bytes of memory used by the python list
+    representation of a parsed s-expression.  Atoms which are shared between
+    several lists are counted once.
+    """
+    size = 0
+    seen = set()
+    stack = [s_exp]
+
+    while stack:
+        item = stack.pop()
+
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+
+        size += sys.getsizeof(item)
+        if isinstance(item, list):
+            stack.extend(item)
+
+    return size
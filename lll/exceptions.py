@@ -1,16 +1,51 @@
 from typing import (
+    Any,
     List,
     Optional,
+    Tuple,
+    Type,
+    TypeVar,
 )
 
 
+def _find_line_start(source_code: str, line_offset: int) -> int:
+    """
+    Return the offset of the first character of the line at ``line_offset``
+    in ``source_code``.  Negative line offsets count back from the last line.
+    As with ``str.splitlines``, a trailing newline does not begin a line.
+    """
+    if line_offset >= 0:
+        start = 0
+        for _ in range(line_offset):
+            start = source_code.find('\n', start) + 1
+        return start
+
+    end = len(source_code) - 1 if source_code.endswith('\n') else len(source_code)
+    for _ in range(-line_offset):
+        end = source_code.rfind('\n', 0, end)
+    return end + 1
+
+
+TError = TypeVar('TError', bound='FormattedError')
+
+
 class FormattedError(Exception):
+    """
+    An error in source code which is formatted with the line containing the
+    error.  The line is only extracted from the source code once it is needed,
+    so that errors are cheap to raise in large sources.
+    """
     msg: str
-    source_lines: List[str]
-    line_offset: int
-    col_offset: int
+    source_code: str
     mark_size: int
     file_name: Optional[str]
+    first_line_offset: int
+    first_col_offset: int
+
+    _line_offset: int
+    _col_offset: int
+    _index: Optional[int]
+    _position: Optional[Tuple[int, int, str]]
 
     def __init__(self,
                  msg: str,
@@ -18,36 +53,171 @@ class FormattedError(Exception):
                  line_offset: int,
                  col_offset: int,
                  mark_size: int = 1,
-                 file_name: str = None):
+                 file_name: str = None,
+                 first_line_offset: int = 0,
+                 first_col_offset: int = 0):
         self.msg = msg
-        self.source_lines = source_code.splitlines()
+        self.source_code = source_code
 
-        # Manually resolve negative offsets for error messages
-        if line_offset < 0:
-            self.line_offset = len(self.source_lines) + line_offset
-        else:
-            self.line_offset = line_offset
-        if col_offset < 0:
-            self.col_offset = len(self.source_lines[line_offset]) + col_offset
-        else:
-            self.col_offset = col_offset
+        # Negative offsets are resolved when the error is formatted
+        self._line_offset = line_offset
+        self._col_offset = col_offset
+        self._index = None
+        self._position = None
 
         self.mark_size = mark_size
         self.file_name = file_name
 
+        # Line offset of the first line of the source code if it is an excerpt
+        # of a larger source and the column offset of its first character if
+        # the start of its first line was left out
+        self.first_line_offset = first_line_offset
+        self.first_col_offset = first_col_offset
+
+    @classmethod
+    def from_index(cls: Type[TError],
+                   msg: str,
+                   source_code: str,
+                   index: int,
+                   mark_size: int = 1,
+                   file_name: str = None,
+                   first_line_offset: int = 0,
+                   first_col_offset: int = 0) -> TError:
+        """
+        Return an error positioned at the character at ``index`` in the source
+        code.
+        """
+        error = cls(
+            msg,
+            source_code,
+            0,
+            0,
+            mark_size,
+            file_name,
+            first_line_offset,
+            first_col_offset,
+        )
+        error._index = index
+
+        return error
+
+    def _get_position(self) -> Tuple[int, int, str]:
+        """
+        Return the line and column offsets of the error and the line containing
+        it.
+        """
+        if self._position is not None:
+            return self._position
+
+        source_code = self.source_code
+
+        if self._index is not None:
+            line_start = source_code.rfind('\n', 0, self._index) + 1
+            line_offset = source_code.count('\n', 0, line_start)
+        else:
+            line_start = _find_line_start(source_code, self._line_offset)
+            if self._line_offset < 0:
+                line_offset = source_code.count('\n', 0, line_start)
+            else:
+                line_offset = self._line_offset
+
+        line_end = source_code.find('\n', line_start)
+        if line_end == -1:
+            line_end = len(source_code)
+        line = source_code[line_start:line_end]
+
+        # Lines end with either line ending
+        if line.endswith('\r'):
+            line = line[:-1]
+
+        if self._index is not None:
+            col_offset = self._index - line_start
+        elif self._col_offset < 0:
+            col_offset = len(line) + self._col_offset
+        else:
+            col_offset = self._col_offset
+
+        self._position = (line_offset, col_offset, line)
+
+        return self._position
+
+    def _is_line_complete(self) -> bool:
+        """
+        Return whether the source code includes the end of the line containing
+        the error.  Errors positioned from the end of the source code are taken
+        to be at EOF.
+        """
+        if self._index is None:
+            return True
+        return self.source_code.find('\n', self._index) != -1
+
+    def _extend_source(self, text: str) -> None:
+        """
+        Append ``text`` to the source code, as when the remainder of the line
+        containing the error was not available when the error was raised.
+        """
+        self.source_code += text
+        self._position = None
+
+    @property
+    def line_offset(self) -> int:
+        return self._get_position()[0]
+
+    def _get_line_col_offset(self, line_offset: int) -> int:
+        """
+        Return the column offset in its line of the first character of the line
+        of the source code at ``line_offset``.
+        """
+        return self.first_col_offset if line_offset == 0 else 0
+
+    @property
+    def col_offset(self) -> int:
+        line_offset, col_offset, _ = self._get_position()
+        return self._get_line_col_offset(line_offset) + col_offset
+
+    @property
+    def source_lines(self) -> List[str]:
+        return self.source_code.splitlines()
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        line_offset, col_offset, line = self._get_position()
+
+        # Only the line containing the error is needed to format the error, so
+        # avoid pickling the entire source code
+        return (
+            self.__class__,
+            (
+                self.msg,
+                line,
+                0,
+                col_offset,
+                self.mark_size,
+                self.file_name,
+                self.first_line_offset + line_offset,
+                self._get_line_col_offset(line_offset),
+            ),
+        )
+
     def __str__(self) -> str:
         if self.file_name is not None:
             prefix = self.file_name + ':'
         else:
             prefix = 'line '
 
-        line_no = self.line_offset + 1
-        col_no = self.col_offset + 1
+        line_offset, col_offset, line = self._get_position()
+
+        line_col_offset = self._get_line_col_offset(line_offset)
 
-        line = self.source_lines[self.line_offset]
+        line_no = self.first_line_offset + line_offset + 1
+        col_no = line_col_offset + col_offset + 1
+
+        if line_col_offset > 0:
+            # Mark the start of the line as left out
+            line = '...' + line
+            col_offset += 3
 
         # Error mark reaches back from column offset
-        mark = ' ' * (self.col_offset - self.mark_size + 1)
+        mark = ' ' * (col_offset - self.mark_size + 1)
         mark += '^' * self.mark_size
 
         return f'{prefix}{line_no}:{col_no}: {self.msg}\n{line}\n{mark}'
@@ -55,3 +225,10 @@ class FormattedError(Exception):
 
 class ParseError(FormattedError):
     pass
+
+
+class ParseLimitError(ParseError):
+    """
+    Raised when parsing source code exceeds a configured limit.
+    """
+    pass
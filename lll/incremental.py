@@ -0,0 +1,252 @@
+import bisect
+from typing import (
+    Dict,
+    List,
+    Optional,
+    TextIO,
+    Tuple,
+    Union,
+)
+
+from lll.exceptions import (
+    ParseError,
+)
+from lll.parser import (
+    BytesLike,
+    ParseBuffer,
+    SExprList,
+    SourceLocations,
+    SymbolTable,
+    parse_s_exp_with_locations,
+)
+
+
+# The offsets at which the children of a list start and end, relative to the
+# offset of the list's opening paren
+Spans = Tuple[List[int], List[int]]
+
+
+class ParseState:
+    """
+    The source code and parsed s-expression of a document which can be updated
+    with ``reparse`` after an edit.
+
+    Besides the s-expression, the state records the spans of the children of
+    each list in the s-expression, keyed by the id of the list.  Spans are
+    relative to the start of their list so that an edit only changes the spans
+    of the lists which contain it.  Parsed lists must not be mutated.
+    """
+    __slots__ = ('source_code', 's_exp', 'symbol_table', 'spans')
+
+    source_code: str
+    s_exp: SExprList
+    symbol_table: Optional[SymbolTable]
+    spans: Dict[int, Spans]
+
+    def __init__(self,
+                 source_code: str,
+                 s_exp: SExprList,
+                 symbol_table: Optional[SymbolTable],
+                 spans: Dict[int, Spans]):
+        self.source_code = source_code
+        self.s_exp = s_exp
+        self.symbol_table = symbol_table
+        self.spans = spans
+
+
+def _add_spans(spans: Dict[int, Spans],
+               items: SExprList,
+               locations: SourceLocations,
+               offset: int) -> Spans:
+    """
+    Add the spans of the lists in ``items``, which are the top-level items of
+    a parse with ``locations``, to ``spans``.
+
+    :returns: The spans of ``items`` themselves relative to ``offset``.
+    """
+    starts = locations.starts
+    ends = locations.ends
+
+    children = locations.get_children()
+    top_spans = (
+        [starts[child] + offset for child in children],
+        [ends[child] + offset for child in children],
+    )
+
+    stack = list(zip(items, children))
+    while stack:
+        item, node = stack.pop()
+        if not isinstance(item, list):
+            continue
+
+        start = starts[node]
+        children = locations.get_children(node)
+
+        spans[id(item)] = (
+            [starts[child] - start for child in children],
+            [ends[child] - start for child in children],
+        )
+        stack.extend(zip(item, children))
+
+    return top_spans
+
+
+def _remove_spans(spans: Dict[int, Spans], items: SExprList) -> None:
+    """
+    Remove the spans of the lists in ``items`` from ``spans``.
+    """
+    stack = list(items)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            del spans[id(item)]
+            stack.extend(item)
+
+
+def parse_with_state(str_or_buffer: Union[str, TextIO, BytesLike],
+                     symbol_table: SymbolTable = None) -> ParseState:
+    """
+    Parse the s-expression contained in a string or text buffer and return a
+    state which can be updated with ``reparse``.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+
+    :returns: The parse state of the source code.
+    """
+    source_code = ParseBuffer(str_or_buffer).source_code
+    s_exp, locations = parse_s_exp_with_locations(source_code, symbol_table)
+
+    spans: Dict[int, Spans] = {}
+    spans[id(s_exp)] = _add_spans(spans, s_exp, locations, 0)
+
+    return ParseState(source_code, s_exp, symbol_table, spans)
+
+
+def reparse(state: ParseState, start: int, end: int, text: str) -> ParseState:
+    """
+    Return the parse state of the source code of ``state`` after replacing the
+    characters from ``start`` up to ``end`` with ``text``.
+
+    Only the items of the innermost list containing the edit which overlap or
+    touch the edit are reparsed.  Other items are shared with ``state``, which
+    remains valid.  If the edited items cannot be parsed on their own, as when
+    the edit opens a string literal or comment which continues past them, the
+    whole source code is reparsed.
+
+    :param state: The parse state of the source code before the edit.
+    :param start: The offset of the first replaced character.
+    :param end: The offset after the last replaced character.
+    :param text: The replacement text.
+
+    :returns: The parse state of the edited source code.
+    """
+    source_code = state.source_code
+
+    if not 0 <= start <= end <= len(source_code):
+        raise ValueError(f'invalid edit range: {start}-{end}')
+
+    new_source_code = source_code[:start] + text + source_code[end:]
+
+    # Find the innermost list whose parens enclose the edit.  Each entry of the
+    # path is a list, its offset, and the index of its child on the path.
+    path: List[Tuple[SExprList, int, int]] = []
+    current = state.s_exp
+    offset = 0
+    current_end = len(source_code)
+
+    while True:
+        starts, ends = state.spans[id(current)]
+
+        # First child which ends after the edit begins
+        index = bisect.bisect_right(ends, start - offset)
+        if index == len(starts):
+            break
+
+        child = current[index]
+        child_start = offset + starts[index]
+        child_end = offset + ends[index]
+
+        if not (isinstance(child, list) and child_start < start and end < child_end):
+            break
+
+        path.append((current, offset, index))
+        current = child
+        offset = child_start
+        current_end = child_end
+
+    # Children which overlap or touch the edit, and the region between their
+    # unaffected neighbours
+    first = bisect.bisect_left(ends, start - offset)
+    last = bisect.bisect_right(starts, end - offset)
+
+    if first > 0:
+        region_start = offset + ends[first - 1]
+    elif path:
+        region_start = offset + 1
+    else:
+        region_start = 0
+
+    if last < len(starts):
+        region_end = offset + starts[last]
+    elif path:
+        region_end = current_end - 1
+    else:
+        region_end = current_end
+
+    delta = len(text) - (end - start)
+    at_eof = region_end == len(source_code)
+    region = new_source_code[region_start:region_end + delta]
+
+    try:
+        # Words in the region are terminated by whatever follows it
+        items, locations = parse_s_exp_with_locations(
+            region if at_eof else region + ' ',
+            state.symbol_table,
+        )
+    except ParseError:
+        # Errors are reported by the full parse so that they are positioned
+        # in the whole source code
+        in_context = False
+    else:
+        if at_eof:
+            in_context = True
+        else:
+            # A comment at the end of the region would continue past it
+            trailing_start = locations.ends[locations.get_children()[-1]] if items else 0
+            last_line_start = region.rfind('\n') + 1
+            in_context = ';' not in region[max(trailing_start, last_line_start):]
+
+    if not in_context:
+        return parse_with_state(new_source_code, state.symbol_table)
+
+    spans = state.spans.copy()
+
+    # Replace the affected children of the innermost list
+    _remove_spans(spans, current[first:last])
+    del spans[id(current)]
+
+    region_starts, region_ends = _add_spans(spans, items, locations, region_start - offset)
+
+    new_list = current[:first] + items + current[last:]
+    spans[id(new_list)] = (
+        starts[:first] + region_starts + [s + delta for s in starts[last:]],
+        ends[:first] + region_ends + [e + delta for e in ends[last:]],
+    )
+
+    # Copy the lists on the path to the innermost list
+    while path:
+        parent, offset, index = path.pop()
+        starts, ends = spans.pop(id(parent))
+
+        new_parent = parent[:]
+        new_parent[index] = new_list
+
+        spans[id(new_parent)] = (
+            starts[:index + 1] + [s + delta for s in starts[index + 1:]],
+            ends[:index] + [e + delta for e in ends[index:]],
+        )
+        new_list = new_parent
+
+    return ParseState(new_source_code, new_list, state.symbol_table, spans)
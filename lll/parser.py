@@ -1,76 +1,245 @@
+from array import (
+    array,
+)
+import bisect
+import codecs
+import collections
 import io
+import itertools
+import mmap
+import os
+import re
+import time
 from typing import (
     Any,
+    BinaryIO,
+    Callable,
+    Dict,
     Iterator,
     List,
+    Match,
+    MutableMapping,
+    NamedTuple,
+    NoReturn,
     Optional,
+    Pattern,
     TextIO,
+    Tuple,
+    Type,
     Union,
 )
+import weakref
 
 from lll.exceptions import (
     ParseError,
+    ParseLimitError,
 )
 
 
 SExprList = List[Union[int, str, 'Symbol', Any]]
 
+# Utf-8 encoded source code
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+# Incremented whenever the parser produces different output for some input
+PARSER_VERSION = 1
+
 
 WORD_SEPARATORS = {' ', '\t', '\n'}
 
 
+def _get_position(newline_offsets: List[int], index: int) -> Tuple[int, int]:
+    """
+    Return the line and column offsets of the character at ``index`` in source
+    code with the given newline offsets.
+    """
+    # Number of newlines which occur before the index
+    line_offset = bisect.bisect_left(newline_offsets, index)
+
+    if line_offset == 0:
+        return 0, index
+    return line_offset, index - newline_offsets[line_offset - 1] - 1
+
+
 class ParseBuffer:
     """
     A buffer that iterates over a source code string while tracking the line
     and column offsets into the string.
+
+    The buffer always tracks an absolute index into the string.  If
+    ``lazy_positions`` is true, the buffer tracks only that index and line and
+    column offsets are resolved from a table of newline offsets when they are
+    read.
+
+    If the source code is an excerpt of a larger source, ``first_line_offset``
+    gives the line offset of its first line in that source and is used to
+    number lines in error messages.  Line offsets tracked by the buffer are
+    always relative to its own source code.  ``prefix`` is source code which
+    precedes the excerpt from the start of its first line and is only shown in
+    error messages.  If the start of the first line of the prefix, or of the
+    source code if there is no prefix, was left out, ``first_col_offset``
+    gives the column offset of its first character.
     """
-    __slots__ = ('source_code', 'file_name', 'line_offset', 'col_offset')
+    __slots__ = (
+        'source_code',
+        'file_name',
+        'lazy_positions',
+        'first_line_offset',
+        'prefix',
+        'first_col_offset',
+        'index',
+        '_line_offset',
+        '_col_offset',
+        '_newline_offsets',
+    )
 
     source_code: str
     file_name: Optional[str]
-    line_offset: int
-    col_offset: int
+    lazy_positions: bool
+    first_line_offset: int
+    prefix: str
+    first_col_offset: int
+    index: int
+
+    _line_offset: int
+    _col_offset: int
+    _newline_offsets: Optional[List[int]]
 
     def __init__(self,
-                 str_or_buffer: Union[str, TextIO],
-                 file_name: str = None):
+                 str_or_buffer: Union[str, TextIO, BytesLike],
+                 file_name: str = None,
+                 lazy_positions: bool = False,
+                 first_line_offset: int = 0,
+                 prefix: str = '',
+                 first_col_offset: int = 0):
         if isinstance(str_or_buffer, str):
             self.source_code = str_or_buffer
-        elif isinstance(str_or_buffer, io.TextIOWrapper):
+        elif isinstance(str_or_buffer, io.TextIOBase):
             self.source_code = str_or_buffer.read()
+        elif isinstance(str_or_buffer, (bytes, bytearray, memoryview)):
+            self.source_code = _decode_bytes(_get_byte_data(str_or_buffer), file_name)
         else:
             raise ValueError('unsupported input type for buffer')
 
         self.file_name = file_name
+        self.lazy_positions = lazy_positions
+        self.first_line_offset = first_line_offset
+        self.prefix = prefix
+        self.first_col_offset = first_col_offset
 
         # Parsing position
-        self.line_offset = 0
-        self.col_offset = 0
+        self.index = 0
+        self._line_offset = 0
+        self._col_offset = 0
+
+        # Built on first use
+        self._newline_offsets = None
 
     def _handle_char(self, char: str) -> None:
         if char == '\n':
-            self.line_offset += 1
-            self.col_offset = 0
+            self._line_offset += 1
+            self._col_offset = 0
         else:
-            self.col_offset += 1
+            self._col_offset += 1
 
     def __iter__(self) -> Iterator[str]:
-        for char in self.source_code:
-            yield char
-            self._handle_char(char)
+        if self.lazy_positions:
+            for char in self.source_code:
+                yield char
+                self.index += 1
+        else:
+            for char in self.source_code:
+                yield char
+                self.index += 1
+                self._handle_char(char)
+
+    def _get_newline_offsets(self) -> List[int]:
+        if self._newline_offsets is None:
+            source_code = self.source_code
+            newline_offsets = []
+
+            offset = source_code.find('\n')
+            while offset != -1:
+                newline_offsets.append(offset)
+                offset = source_code.find('\n', offset + 1)
+
+            self._newline_offsets = newline_offsets
+
+        return self._newline_offsets
+
+    def get_position(self, index: int) -> Tuple[int, int]:
+        """
+        Return the line and column offsets of the character at ``index`` in the
+        source code.
+        """
+        return _get_position(self._get_newline_offsets(), index)
+
+    @property
+    def line_offset(self) -> int:
+        if self.lazy_positions:
+            return self.get_position(self.index)[0]
+        return self._line_offset
+
+    @property
+    def col_offset(self) -> int:
+        if self.lazy_positions:
+            return self.get_position(self.index)[1]
+        return self._col_offset
+
+    def seek(self, index: int) -> None:
+        """
+        Move the position of the buffer to the character at ``index`` in the
+        source code.
+        """
+        self.index = index
+
+        if not self.lazy_positions:
+            self._line_offset, self._col_offset = self.get_position(index)
 
     def raise_error(self,
                     msg: str,
                     line_offset: int = None,
                     col_offset: int = None,
-                    mark_size: int = 1) -> None:
-        raise ParseError(
+                    mark_size: int = 1,
+                    error_class: Type[ParseError] = ParseError) -> NoReturn:
+        # Errors positioned by index or from the end of the source code are
+        # shown with the prefix
+        from_end = line_offset is not None and line_offset < 0
+        if self.prefix and (from_end or line_offset is None and col_offset is None):
+            prefix = self.prefix
+            buf = ParseBuffer(
+                prefix + self.source_code,
+                file_name=self.file_name,
+                lazy_positions=True,
+                first_line_offset=self.first_line_offset - prefix.count('\n'),
+                first_col_offset=self.first_col_offset,
+            )
+            buf.seek(len(prefix) + self.index)
+            buf.raise_error(msg, line_offset, col_offset, mark_size, error_class)
+
+        if line_offset is None and col_offset is None:
+            # Leave the line and column of the error to be found if the error
+            # is formatted
+            raise error_class.from_index(
+                msg,
+                self.source_code,
+                self.index,
+                mark_size=mark_size,
+                file_name=self.file_name,
+                first_line_offset=self.first_line_offset,
+                first_col_offset=self.first_col_offset,
+            )
+
+        raise error_class(
             msg,
             self.source_code,
             self.line_offset if line_offset is None else line_offset,
             self.col_offset if col_offset is None else col_offset,
             mark_size=mark_size,
             file_name=self.file_name,
+            first_line_offset=self.first_line_offset,
+            first_col_offset=self.first_col_offset,
         )
 
 
@@ -89,6 +258,64 @@ class Symbol(str):
         return str(self)
 
 
+class SymbolTable:
+    """
+    A table which interns symbols so that all symbols with the same text which
+    are parsed using the table are the same ``Symbol`` instance.  A table may
+    be shared between any number of parses.
+
+    If ``max_size`` is given, the table holds at most that many symbols and
+    evicts the least recently used symbol when it is full.  If ``weak`` is
+    true, the table holds only weak references to its symbols so that a symbol
+    is evicted once it is no longer used elsewhere.
+    """
+    __slots__ = ('max_size', '_symbols')
+
+    max_size: Optional[int]
+
+    _symbols: MutableMapping[str, Symbol]
+
+    def __init__(self, max_size: int = None, weak: bool = False):
+        if max_size is not None:
+            if weak:
+                raise ValueError('max_size is not supported for weak symbol tables')
+            if max_size < 1:
+                raise ValueError('max_size must be positive')
+
+        self.max_size = max_size
+
+        if weak:
+            self._symbols = weakref.WeakValueDictionary()
+        elif max_size is not None:
+            self._symbols = collections.OrderedDict()
+        else:
+            self._symbols = {}
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._symbols
+
+    def intern(self, text: str) -> Symbol:
+        """
+        Return the symbol in the table with the given text, adding a new
+        symbol to the table if necessary.
+        """
+        symbols = self._symbols
+        symbol = symbols.get(text)
+
+        if symbol is None:
+            symbol = symbols[text] = Symbol(text)
+
+            if self.max_size is not None and len(symbols) > self.max_size:
+                symbols.popitem(last=False)  # type: ignore
+        elif self.max_size is not None:
+            symbols.move_to_end(text)  # type: ignore
+
+        return symbol
+
+
 DIGIT_CHARS = set('0123456789')
 PREFIX_TO_INT_BASE = {
     '0x': 16,
@@ -100,141 +327,1728 @@ PREFIX_TO_INT_BASE = {
 }
 
 
-def _parse_symbol_or_int(buf: ParseBuffer, word: str) -> Union[int, Symbol]:
-    try:
-        is_int = (
-            word[0] in DIGIT_CHARS or
-            (word[0] == '-' and word[1] in DIGIT_CHARS)
-        )
-    except IndexError:
-        is_int = False
+def _get_int_base(word: str) -> Optional[int]:
+    """
+    Return the base of the int literal given by ``word`` or ``None`` if
+    ``word`` is a symbol.
+    """
+    char = word[0]
 
-    if not is_int:
-        return Symbol(word)
+    if char in DIGIT_CHARS:
+        # Default integer base is 10
+        return PREFIX_TO_INT_BASE.get(word[:2], 10)
+    elif char == '-' and word[1:2] in DIGIT_CHARS:
+        return PREFIX_TO_INT_BASE.get(word[:3], 10)
 
-    # Default integer base is 10
-    if word[0] == '-':
-        base = PREFIX_TO_INT_BASE.get(word[:3], 10)
-    else:
-        base = PREFIX_TO_INT_BASE.get(word[:2], 10)
+    return None
 
+
+# The maximum number of decoded int literals which are shared between parses
+INT_LITERAL_CACHE_SIZE = 8192
+
+_int_literal_cache: Dict[str, int] = {}
+
+
+def _decode_word(word: str,
+                 make_symbol: Callable[[str], Symbol] = Symbol) -> Union[int, Symbol]:
+    """
+    Decode ``word`` as a symbol or int literal.  Symbols are created with
+    ``make_symbol``.  Raises ``ValueError`` if ``word`` is an invalid int
+    literal.
+    """
+    value = _int_literal_cache.get(word)
+    if value is not None:
+        return value
+
+    base = _get_int_base(word)
+
+    if base is None:
+        return make_symbol(word)
+
+    value = int(word, base)
+
+    # Start over rather than track recency so that hits stay cheap
+    if len(_int_literal_cache) >= INT_LITERAL_CACHE_SIZE:
+        _int_literal_cache.clear()
+    _int_literal_cache[word] = value
+
+    return value
+
+
+def _parse_symbol_or_int(buf: ParseBuffer, word: str) -> Union[int, Symbol]:
     try:
-        # Try to parse this word as an integer with the appropriate base
-        int_val = int(word, base)
+        return _decode_word(word)
     except ValueError:
+        # Mark the word from its last character
+        buf.seek(buf.index - 1)
         buf.raise_error(
-            f'invalid literal for int with base {base}: {repr(word)}',
-            col_offset=buf.col_offset - 1,
+            f'invalid literal for int with base {_get_int_base(word)}: {repr(word)}',
             mark_size=len(word),
         )
 
-    return int_val
 
+# Each match of this pattern is a single token: a paren, a word (symbol or int
+# literal), a comment, a terminated string literal, or a lone double quote
+# beginning an unterminated string literal.  Whitespace matches none of the
+# alternatives and is skipped over.
+TOKEN_RE = re.compile(
+    r"""
+      [()]
+    | [^ \t\n;()"]+
+    | ;[^\n]*
+    | "[^"\\]*(?:\\.[^"\\]*)*"
+    | "
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+WORD_TERMINATORS = WORD_SEPARATORS | {';', '(', ')', '"'}
+STR_ESCAPE_RE = re.compile(r'\\(.)', re.DOTALL)
+STR_ESCAPES = {
+    '"': '"',
+    '\\': '\\',
+    'n': '\n',
+    't': '\t',
+}
 
-def parse_s_exp(str_or_buffer: Union[str, TextIO]) -> SExprList:
+
+def _unescape_str_escape(match: Match[str]) -> str:
+    char = match.group(1)
+    try:
+        return STR_ESCAPES[char]
+    except KeyError:
+        # Unknown escape sequences are kept verbatim
+        return '\\' + char
+
+
+def _unescape_str(body: str) -> str:
+    if '\\' not in body:
+        return body
+    return STR_ESCAPE_RE.sub(_unescape_str_escape, body)
+
+
+def _find_word_end(source_code: str, word: str, pos: int = 0) -> int:
     """
-    Parse the s-expression contained in a string or text buffer.
+    Return the offset of the character that terminates the first occurrence of
+    the word token ``word`` in ``source_code`` at or after ``pos``.
+    """
+    for match in TOKEN_RE.finditer(source_code, pos):
+        if match.group() == word:
+            return match.end()
 
-    (Adapted from https://en.wikipedia.org/wiki/S-expression#Parsing)
+    raise ValueError(f'word not found in source code: {repr(word)}')
 
-    :param str_or_buffer: A string or buffer containing an s-expression.
 
-    :returns: A python list representation of the parsed s-expression.
+def _split_complete_tokens(source_code: str,
+                           pos: int,
+                           endpos: int) -> Tuple[List[str], int]:
+    """
+    Return the tokens in ``source_code`` between ``pos`` and ``endpos`` which
+    cannot be continued beyond ``endpos`` along with the offset at which the
+    remaining source code begins.  ``endpos`` must follow a word separator or
+    paren, so that only a comment or string literal can be continued beyond
+    it.
     """
-    buf = ParseBuffer(str_or_buffer)
+    tokens = TOKEN_RE.findall(source_code, pos, endpos)
 
-    result_stack: List[SExprList] = [[]]
-    symbol_or_int = ''
-    str_literal = ''
+    if '"' in tokens:
+        # An unterminated string literal may be terminated later
+        for i, match in enumerate(TOKEN_RE.finditer(source_code, pos, endpos)):
+            if match.group() == '"':
+                del tokens[i:]
+                endpos = match.start()
+                break
 
-    in_comment = False
-    in_str = False
-    in_str_escape = False
+    # A comment which reaches ``endpos`` may be continued later
+    if tokens and tokens[-1][0] == ';' and source_code.endswith(tokens[-1], pos, endpos):
+        endpos -= len(tokens.pop())
 
-    for char in buf:
-        # Parsing a comment
-        if in_comment:
-            # Comments end at the end of a line
-            if char == '\n':
-                in_comment = False
-            # Otherwise, ignore char in comment
+    return tokens, endpos
 
-        elif not in_str:
-            # Begin parsing a comment
-            if char == ';':
-                in_comment = True
 
-            # Begin parsing an s-expression
-            elif char == '(':
-                result_stack.append([])
+def _find_token_boundary(source_code: str) -> int:
+    """
+    Return the offset following the last word separator or paren in
+    ``source_code`` or 0 if there is none.
+    """
+    return max(source_code.rfind(char) for char in ' \t\n()') + 1
+
+
+def _raise_unexpected_paren(buf: ParseBuffer,
+                            tokens: List[str],
+                            pos: int,
+                            depth: int) -> NoReturn:
+    """
+    Raise a parse error for the first closing paren in ``tokens``, which were
+    found in the source code of ``buf`` at or after ``pos`` and fed to a
+    builder with ``depth`` open lists, that has no matching opening paren.
+    """
+    for index, token in enumerate(tokens):
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+            if depth < 0:
+                break
+    else:
+        raise Exception('Unreachable')
+
+    match = next(itertools.islice(TOKEN_RE.finditer(buf.source_code, pos), index, None))
+
+    buf.seek(match.start())
+    buf.raise_error('unexpected closing paren')
+
+
+class _FormBuilder:
+    """
+    Builds s-expressions from a sequence of tokens which may be fed to the
+    builder in several parts.
+    """
+    __slots__ = ('result_stack', 'atoms', 'make_symbol')
+
+    result_stack: List[SExprList]
+    atoms: Dict[str, Union[int, Symbol]]
+    make_symbol: Callable[[str], Symbol]
+
+    def __init__(self, symbol_table: SymbolTable = None) -> None:
+        self.result_stack = [[]]
+
+        # Words are decoded once per parse and repeated symbols and int
+        # literals share a single instance
+        self.atoms = {}
+
+        if symbol_table is None:
+            self.make_symbol = Symbol
+        else:
+            self.make_symbol = symbol_table.intern
+
+    def feed(self, buf: ParseBuffer, tokens: List[str], pos: int = 0) -> SExprList:
+        """
+        Add the given tokens, which were found in the source code of ``buf`` at
+        or after ``pos``, to the s-expressions being built.
+
+        :returns: A list of the top-level s-expressions that were completed.
+        """
+        result_stack = self.result_stack
+        current = result_stack[-1]
+        atoms = self.atoms
+
+        depth = len(result_stack) - 1
+
+        try:
+            for token in tokens:
+                char = token[0]
+
+                # Begin parsing an s-expression
+                if char == '(':
+                    current = []
+                    result_stack.append(current)
+
+                # End an s-expression and add to result.  Closing the result
+                # itself raises an ``IndexError``.
+                elif char == ')':
+                    temp = result_stack.pop()
+                    current = result_stack[-1]
+                    current.append(temp)
+
+                # Ignore comment
+                elif char == ';':
+                    pass
+
+                elif char == '"':
+                    if len(token) == 1:
+                        buf.raise_error(
+                            'reached EOF before termination of string literal',
+                            line_offset=-1,
+                            col_offset=-1,
+                        )
+
+                    # Add string literal to result
+                    current.append(_unescape_str(token[1:-1]))
+
+                # Add a symbol or int literal to result
+                else:
+                    atom = atoms.get(token)
+                    if atom is None:
+                        atom = self._decode_new_word(buf, token, pos)
+
+                    current.append(atom)
+
+        except IndexError:
+            _raise_unexpected_paren(buf, tokens, pos, depth)
+
+        completed = result_stack[0]
+        result_stack[0] = []
+
+        return completed
+
+    def _decode_new_word(self, buf: ParseBuffer, token: str, pos: int) -> Union[int, Symbol]:
+        """
+        Decode a word which has not yet been seen in this parse.
+        """
+        try:
+            atom = self.atoms[token] = _decode_word(token, self.make_symbol)
+        except ValueError:
+            # Report the error relative to the end of the word
+            buf.seek(_find_word_end(buf.source_code, token, pos))
+            _parse_symbol_or_int(buf, token)
+
+        return atom
+
+    def close(self, buf: ParseBuffer, pos: int = 0) -> SExprList:
+        """
+        Add the remaining tokens found in the source code of ``buf`` at or after
+        ``pos`` to the s-expressions being built.  The end of the source code
+        of ``buf`` is taken to be EOF.
+
+        :returns: A list of the top-level s-expressions that were completed.
+        """
+        source_code = buf.source_code
+
+        tokens = TOKEN_RE.findall(source_code, pos)
+
+        # Only whitespace can follow the last token, so a final word token
+        # which ends the source code was not terminated before EOF
+        in_word = (
+            bool(tokens) and
+            tokens[-1][0] not in WORD_TERMINATORS and
+            source_code.endswith(tokens[-1])
+        )
+        if in_word:
+            tokens.pop()
+
+        completed = self.feed(buf, tokens, pos)
+
+        if in_word or len(self.result_stack) > 1:
+            buf.raise_error(
+                'reached EOF before termination of s-expression',
+                line_offset=-1,
+                col_offset=-1,
+            )
+
+        return completed
+
+
+class SourceLocations:
+    """
+    The source spans of the nodes of an s-expression parsed with
+    ``parse_s_exp_with_locations``.
+
+    Nodes are numbered in the order in which they begin in the source code and
+    node ``n`` spans the characters from ``starts[n]`` up to ``ends[n]``.  Since
+    each parsed list is a distinct object, the node of a list can be looked up
+    with ``get_node`` for as long as the parsed s-expression is alive.  Atoms
+    may be shared between several nodes and are found through the children of
+    their lists.
+    """
+    __slots__ = ('starts', 'ends', 'list_nodes', 'newline_offsets')
+
+    starts: 'array[int]'
+    ends: 'array[int]'
+    list_nodes: Dict[int, int]
+    newline_offsets: List[int]
+
+    def __init__(self) -> None:
+        self.starts = array('l')
+        self.ends = array('l')
+
+        # Map the ids of parsed lists to their node numbers
+        self.list_nodes = {}
+
+        self.newline_offsets = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def get_node(self, s_exp: SExprList) -> int:
+        """
+        Return the node number of a list in the parsed s-expression.
+        """
+        try:
+            return self.list_nodes[id(s_exp)]
+        except KeyError:
+            raise ValueError('list is not a node of the parsed s-expression') from None
+
+    def get_span(self, node: int) -> Tuple[int, int]:
+        """
+        Return the start and end offsets of node ``node``.
+        """
+        return self.starts[node], self.ends[node]
+
+    def get_children(self, node: int = None) -> List[int]:
+        """
+        Return the node numbers of the children of the list node ``node`` or of
+        the top-level items if ``node`` is ``None``.
+        """
+        starts = self.starts
+        ends = self.ends
+
+        if node is None:
+            child = 0
+            end = len(starts)
+        else:
+            child = node + 1
+            end = bisect.bisect_left(starts, ends[node], child)
+
+        children = []
+        while child < end:
+            children.append(child)
+            # Skip the descendants of the child
+            child = bisect.bisect_left(starts, ends[child], child + 1, end)
+
+        return children
+
+    def locate(self, s_exp: SExprList, index: int = None) -> Tuple[int, int]:
+        """
+        Return the start and end offsets of a list in the parsed s-expression
+        or of its item at ``index``.
+        """
+        node = self.get_node(s_exp)
+
+        if index is None:
+            return self.get_span(node)
+        return self.get_span(self.get_children(node)[index])
+
+    def get_position(self, offset: int) -> Tuple[int, int]:
+        """
+        Return the line and column offsets of the character at ``offset`` in
+        the source code.
+        """
+        return _get_position(self.newline_offsets, offset)
+
+
+class _LocatingFormBuilder(_FormBuilder):
+    """
+    Builds s-expressions while recording the source spans of their nodes.  The
+    source code of each buffer given to the builder must continue from that of
+    the last.
+    """
+    __slots__ = ('locations', 'node_stack')
+
+    locations: SourceLocations
+    node_stack: List[int]
+
+    def __init__(self, symbol_table: SymbolTable = None) -> None:
+        super().__init__(symbol_table)
+
+        self.locations = SourceLocations()
+
+        # Node numbers of the lists being built
+        self.node_stack = []
+
+    def feed(self, buf: ParseBuffer, tokens: List[str], pos: int = 0) -> SExprList:
+        source_code = buf.source_code
+
+        result_stack = self.result_stack
+        current = result_stack[-1]
+        atoms = self.atoms
+
+        node_stack = self.node_stack
+        starts = self.locations.starts
+        ends = self.locations.ends
+        list_nodes = self.locations.list_nodes
+
+        for token in tokens:
+            char = token[0]
+
+            # Only whitespace separates tokens, so the next occurrence of a
+            # token is where it begins
+            start = source_code.find(token, pos)
+            pos = start + len(token)
+
+            if char == '(':
+                current = []
+                result_stack.append(current)
+
+                list_nodes[id(current)] = len(starts)
+                node_stack.append(len(starts))
+                starts.append(start)
+                ends.append(-1)
 
-            # End an s-expression and add to result
             elif char == ')':
-                # End a symbol or int literal and add to result
-                if symbol_or_int:
-                    result_stack[-1].append(_parse_symbol_or_int(buf, symbol_or_int))
-                    symbol_or_int = ''
+                if len(result_stack) == 1:
+                    buf.seek(start)
+                    buf.raise_error('unexpected closing paren')
 
                 temp = result_stack.pop()
-                result_stack[-1].append(temp)
+                current = result_stack[-1]
+                current.append(temp)
 
-            elif char in WORD_SEPARATORS:
-                # End a symbol or int literal and add to result
-                if symbol_or_int:
-                    result_stack[-1].append(_parse_symbol_or_int(buf, symbol_or_int))
-                    symbol_or_int = ''
-                # Otherwise, ignore the whitespace char
+                ends[node_stack.pop()] = pos
 
-            # Begin parsing a string literal
-            elif char == '"':
-                in_str = True
+            elif char == ';':
+                pass
 
             else:
-                symbol_or_int += char
-
-        # Parsing a string literal
-        elif in_str:
-            # Parsing a string escape sequence
-            if in_str_escape:
                 if char == '"':
-                    str_literal += '"'
-                elif char == '\\':
-                    str_literal += '\\'
-                elif char == 'n':
-                    str_literal += '\n'
-                elif char == 't':
-                    str_literal += '\t'
+                    if len(token) == 1:
+                        buf.raise_error(
+                            'reached EOF before termination of string literal',
+                            line_offset=-1,
+                            col_offset=-1,
+                        )
+
+                    current.append(_unescape_str(token[1:-1]))
+
                 else:
-                    str_literal += '\\' + char
-                in_str_escape = False
+                    atom = atoms.get(token)
+                    if atom is None:
+                        atom = self._decode_new_word(buf, token, start)
+
+                    current.append(atom)
+
+                starts.append(start)
+                ends.append(pos)
+
+        completed = result_stack[0]
+        result_stack[0] = []
+
+        return completed
+
+
+class ParseLimits(NamedTuple):
+    """
+    Limits on the resources used to parse source code.  A limit of ``None``
+    is not enforced.
+
+    ``max_depth`` limits the nesting depth of lists, ``max_token_length`` the
+    length in characters of symbols, int literals and string literals,
+    ``max_nodes`` the total number of lists and atoms and ``max_input_size``
+    the length in characters of the source code.
+    """
+    max_depth: Optional[int] = None
+    max_token_length: Optional[int] = None
+    max_nodes: Optional[int] = None
+    max_input_size: Optional[int] = None
+
+
+def _get_limit(limit: Optional[int]) -> float:
+    """
+    Return a limit to compare against with ``>``, for which no limit is
+    infinite.
+    """
+    return float('inf') if limit is None else limit
+
+
+def _raise_limit_error(buf: ParseBuffer, index: int, msg: str) -> NoReturn:
+    buf.seek(index)
+    buf.raise_error(msg, error_class=ParseLimitError)
+
+
+class _LimitedFormBuilder(_FormBuilder):
+    """
+    Builds s-expressions while enforcing limits on their depth, number of
+    nodes and token lengths.  The source code of each buffer given to the
+    builder must continue from that of the last.
+    """
+    __slots__ = ('limits', 'num_nodes')
+
+    limits: ParseLimits
+    num_nodes: int
+
+    def __init__(self, limits: ParseLimits, symbol_table: SymbolTable = None) -> None:
+        super().__init__(symbol_table)
+
+        self.limits = limits
+        self.num_nodes = 0
+
+    def feed(self, buf: ParseBuffer, tokens: List[str], pos: int = 0) -> SExprList:
+        source_code = buf.source_code
+
+        result_stack = self.result_stack
+        current = result_stack[-1]
+        atoms = self.atoms
+
+        limits = self.limits
+        max_depth = _get_limit(limits.max_depth)
+        max_token_length = _get_limit(limits.max_token_length)
+        max_nodes = _get_limit(limits.max_nodes)
+
+        for token in tokens:
+            char = token[0]
+
+            # Only whitespace separates tokens, so the next occurrence of a
+            # token is where it begins
+            start = source_code.find(token, pos)
+            pos = start + len(token)
+
+            if char == ';':
+                continue
+
+            if char == ')':
+                if len(result_stack) == 1:
+                    buf.seek(start)
+                    buf.raise_error('unexpected closing paren')
+
+                temp = result_stack.pop()
+                current = result_stack[-1]
+                current.append(temp)
+                continue
+
+            self.num_nodes += 1
+            if self.num_nodes > max_nodes:
+                _raise_limit_error(
+                    buf, start, f'exceeded maximum number of nodes ({limits.max_nodes})',
+                )
 
-            # Begin escape sequence in string
-            elif char == '\\':
-                in_str_escape = True
+            if char == '(':
+                if len(result_stack) > max_depth:
+                    _raise_limit_error(
+                        buf, start, f'exceeded maximum nesting depth ({limits.max_depth})',
+                    )
 
-            # End string literal and add to result
+                current = []
+                result_stack.append(current)
+                continue
+
+            if len(token) > max_token_length:
+                _raise_limit_error(
+                    buf, start, f'exceeded maximum token length ({limits.max_token_length})',
+                )
+
+            if char == '"':
+                if len(token) == 1:
+                    buf.raise_error(
+                        'reached EOF before termination of string literal',
+                        line_offset=-1,
+                        col_offset=-1,
+                    )
+
+                current.append(_unescape_str(token[1:-1]))
+
+            else:
+                atom = atoms.get(token)
+                if atom is None:
+                    atom = self._decode_new_word(buf, token, start)
+
+                current.append(atom)
+
+        completed = result_stack[0]
+        result_stack[0] = []
+
+        return completed
+
+
+class ParseStats:
+    """
+    Counters describing the source code parsed with a ``stats`` argument.
+    Counters accumulate when the same instance is given to several parses.
+
+    ``num_chars`` and ``num_bytes`` are the number of characters and utf-8
+    encoded bytes of source code and ``num_lists``, ``num_symbols``,
+    ``num_ints``, ``num_strs`` and ``num_comments`` are the number of tokens
+    of each kind.  ``max_depth`` is the deepest nesting of lists.
+    ``num_decoded_words`` is the number of symbols and int literals which were
+    decoded rather than shared with an earlier occurrence in the same parse.
+    ``tokenize_time`` and ``build_time`` are the seconds spent splitting
+    source code into tokens and building lists and atoms from them.
+    """
+    __slots__ = (
+        'num_chars',
+        'num_bytes',
+        'num_lists',
+        'num_symbols',
+        'num_ints',
+        'num_strs',
+        'num_comments',
+        'max_depth',
+        'num_decoded_words',
+        'tokenize_time',
+        'build_time',
+    )
+
+    num_chars: int
+    num_bytes: int
+    num_lists: int
+    num_symbols: int
+    num_ints: int
+    num_strs: int
+    num_comments: int
+    max_depth: int
+    num_decoded_words: int
+    tokenize_time: float
+    build_time: float
+
+    def __init__(self) -> None:
+        self.num_chars = 0
+        self.num_bytes = 0
+        self.num_lists = 0
+        self.num_symbols = 0
+        self.num_ints = 0
+        self.num_strs = 0
+        self.num_comments = 0
+        self.max_depth = 0
+        self.num_decoded_words = 0
+        self.tokenize_time = 0.0
+        self.build_time = 0.0
+
+    @property
+    def num_allocations(self) -> int:
+        """
+        The number of lists and atoms which were built rather than shared with
+        an earlier occurrence in the same parse.
+        """
+        return self.num_lists + self.num_strs + self.num_decoded_words
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={repr(getattr(self, name))}' for name in self.__slots__)
+        return f'ParseStats({fields})'
+
+    def _count_tokens(self, tokens: List[str], atoms: Dict[str, Any], depth: int) -> None:
+        """
+        Count parsed tokens which were fed to a builder at the given depth of
+        nesting.
+        """
+        max_depth = self.max_depth
+
+        for token in tokens:
+            char = token[0]
+
+            if char == '(':
+                self.num_lists += 1
+                depth += 1
+                if depth > max_depth:
+                    max_depth = depth
+            elif char == ')':
+                depth -= 1
+            elif char == ';':
+                self.num_comments += 1
             elif char == '"':
-                result_stack[-1].append(str_literal)
-                str_literal = ''
-                in_str = False
+                self.num_strs += 1
+            elif isinstance(atoms[token], int):
+                self.num_ints += 1
+            else:
+                self.num_symbols += 1
+
+        self.max_depth = max_depth
+
+
+def parse_s_exp(str_or_buffer: Union[str, TextIO, BytesLike],
+                symbol_table: SymbolTable = None,
+                limits: ParseLimits = None,
+                stats: ParseStats = None) -> SExprList:
+    """
+    Parse the s-expression contained in a string or text buffer.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+    :param limits: Optional limits on the resources used to parse the
+        s-expression.  A ``ParseLimitError`` is raised at the point in the
+        source code at which a limit is exceeded.
+    :param stats: An optional ``ParseStats`` to which counters describing the
+        source code and the time spent parsing it are added.
+
+    :returns: A python list representation of the parsed s-expression.
+    """
+    is_bytes = isinstance(str_or_buffer, (bytes, bytearray, memoryview))
+
+    if is_bytes or limits is not None or stats is not None:
+        # Parse in chunks so that neither the decoded source code nor the
+        # tokens of the whole source code are held at once
+        return list(iter_s_exps(
+            str_or_buffer,
+            symbol_table=symbol_table,
+            limits=limits,
+            stats=stats,
+        ))
+
+    buf = ParseBuffer(str_or_buffer, lazy_positions=True)
+
+    return _FormBuilder(symbol_table).close(buf)
+
+
+def parse_s_exp_with_locations(str_or_buffer: Union[str, TextIO, BytesLike],
+                               symbol_table: SymbolTable = None,
+                               ) -> Tuple[SExprList, SourceLocations]:
+    """
+    Parse the s-expression contained in a string or text buffer and record the
+    source span of each parsed list and atom.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+
+    :returns: A tuple of the python list representation of the parsed
+        s-expression and the ``SourceLocations`` of its nodes.
+    """
+    buf = ParseBuffer(str_or_buffer, lazy_positions=True)
+
+    builder = _LocatingFormBuilder(symbol_table)
+    s_exp = builder.close(buf)
+
+    locations = builder.locations
+    locations.newline_offsets = buf._get_newline_offsets()
+
+    return s_exp, locations
+
+
+def _feed_item(builder: _FormBuilder,
+               buf: ParseBuffer,
+               tokens: List[str],
+               pos: int,
+               s_exp: SExprList,
+               errors: List[ParseError]) -> None:
+    """
+    Add the parsed top-level items of ``tokens`` to ``s_exp`` or, if they
+    contain an error, add the error to ``errors``.
+    """
+    try:
+        s_exp.extend(builder.feed(buf, tokens, pos))
+    except ParseError as e:
+        errors.append(e)
+
+        # Drop any lists left open by the error
+        builder.result_stack = [[]]
+
+
+def parse_s_exp_with_errors(str_or_buffer: Union[str, TextIO, BytesLike],
+                            symbol_table: SymbolTable = None,
+                            ) -> Tuple[SExprList, List[ParseError]]:
+    """
+    Parse the s-expression contained in a string or text buffer, recovering
+    from syntax errors.  A top-level item which contains an error is left out
+    of the result and parsing resumes with the next top-level item.  A closing
+    paren without a matching opening paren is reported and skipped.  An
+    unterminated string literal runs to EOF, so it is reported where it begins
+    and nothing after it is parsed.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+
+    :returns: A tuple of the python list representation of the top-level items
+        which were parsed without errors and a list of the errors in the order
+        in which they occur in the source code.
+    """
+    buf = ParseBuffer(str_or_buffer, lazy_positions=True)
+
+    # Most source code has no errors, which the usual parse finds fastest
+    try:
+        return _FormBuilder(symbol_table).close(buf), []
+    except ParseError:
+        pass
+
+    source_code = buf.source_code
+
+    builder = _FormBuilder(symbol_table)
+    s_exp: SExprList = []
+    errors: List[ParseError] = []
+
+    # Tokens of the current top-level item and the offset at which it begins
+    tokens: List[str] = []
+    item_start = 0
+    depth = 0
+
+    for match in TOKEN_RE.finditer(source_code):
+        token = match.group()
+        char = token[0]
+
+        if char == ';':
+            continue
 
+        if token == '"':
+            # Report any errors in the item containing the string literal
+            # before the string literal itself
+            _feed_item(builder, buf, tokens, item_start, s_exp, errors)
+
+            errors.append(ParseError.from_index(
+                'reached EOF before termination of string literal',
+                source_code,
+                match.start(),
+            ))
+            return s_exp, errors
+
+        if char == ')':
+            if depth == 0:
+                errors.append(ParseError.from_index(
+                    'unexpected closing paren',
+                    source_code,
+                    match.start(),
+                ))
+                continue
+
+            depth -= 1
+
+        elif char == '(':
+            depth += 1
+
+        if not tokens:
+            item_start = match.start()
+        tokens.append(token)
+
+        # A word which ends the source code was not terminated before EOF
+        in_word = char not in WORD_TERMINATORS and match.end() == len(source_code)
+
+        if depth == 0 and not in_word:
+            _feed_item(builder, buf, tokens, item_start, s_exp, errors)
+            tokens = []
+
+    if tokens:
+        if tokens[-1][0] not in WORD_TERMINATORS and source_code.endswith(tokens[-1]):
+            tokens.pop()
+
+        _feed_item(builder, buf, tokens, item_start, s_exp, errors)
+
+        errors.append(ParseError(
+            'reached EOF before termination of s-expression',
+            source_code,
+            -1,
+            -1,
+        ))
+
+    return s_exp, errors
+
+
+# String literals and comments, which are blanked out when validating so that
+# parens and words within them are ignored
+VALIDATE_BLANK_RE = re.compile(r';[^\n]*|"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+# The deepest nesting of lists which ``validate`` checks without parsing
+VALIDATE_MAX_DEPTH = 64
+
+
+# The number of top-level lists which ``validate`` matches at a time.  The
+# regex engine holds state for every list it matches in a call, so matching
+# a few at a time bounds the memory used to that of the largest lists.
+VALIDATE_LISTS_PER_MATCH = 16
+
+
+def _make_balanced_re(max_depth: int, max_lists: int) -> Pattern[str]:
+    """
+    Return a pattern which matches text containing up to ``max_lists``
+    top-level lists whose parens are balanced and nested no deeper than
+    ``max_depth``.  Runs of other characters and parens never overlap, so the
+    pattern does not backtrack.
+    """
+    pattern = r'[^()]*'
+    for _ in range(max_depth - 1):
+        pattern = r'[^()]*(?:\(' + pattern + r'\)[^()]*)*'
+
+    return re.compile(r'[^()]*(?:\(' + pattern + r'\)[^()]*){0,%d}' % max_lists)
+
+
+VALIDATE_BALANCED_RE = _make_balanced_re(VALIDATE_MAX_DEPTH, VALIDATE_LISTS_PER_MATCH)
+
+
+def _is_balanced(text: str) -> bool:
+    """
+    Return whether the parens in ``text`` are balanced and nested no deeper
+    than ``VALIDATE_MAX_DEPTH``.
+    """
+    pos = 0
+    match = VALIDATE_BALANCED_RE.match
+
+    while pos < len(text):
+        result = match(text, pos)
+        if result is None or result.end() == pos:
+            return False
+        pos = result.end()
+
+    return True
+
+
+# A word which begins like an int literal but is not one of the common forms
+# of int literal, following the word separator or paren which precedes it
+VALIDATE_UNCOMMON_INT_RE = re.compile(
+    r"""
+    [ \t\n()]
+    # Cheaply rule out most words before trying the common forms
+    (?=[-0-9])
+    (?!
+        -?(?:0x[0-9a-fA-F]+|0o[0-7]+|0b[01]+|[0-9]+)\r?
+        (?![^ \t\n()])
+    )
+    -?[0-9]
+    """,
+    re.VERBOSE,
+)
+
+
+def validate(str_or_buffer: Union[str, TextIO, BytesLike]) -> Optional[ParseError]:
+    """
+    Check whether the s-expression contained in a string or text buffer can be
+    parsed without building it.  The source code is scanned with a few regular
+    expressions rather than tokenized.  Only source code which the scan cannot
+    confirm, such as source code with errors or with lists nested deeper than
+    ``VALIDATE_MAX_DEPTH``, is parsed in full.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+
+    :returns: ``None`` if the s-expression can be parsed or the ``ParseError``
+        which ``parse_s_exp`` raises for it otherwise.
+    """
+    source_code = ParseBuffer(str_or_buffer).source_code
+
+    # A leading space lets the first word follow a word separator
+    text = ' ' + source_code
+    if '"' in text or ';' in text:
+        text = VALIDATE_BLANK_RE.sub(' ', text)
+
+    is_valid = (
+        # No unterminated string literal
+        '"' not in text and
+        # No word which is terminated by EOF
+        text[-1] in ' \t\n()' and
+        _is_balanced(text) and
+        VALIDATE_UNCOMMON_INT_RE.search(text) is None
+    )
+    if is_valid:
+        return None
+
+    try:
+        parse_s_exp(source_code)
+    except ParseError as e:
+        return e
+
+    return None
+
+
+# Whitespace, words, comments and terminated string literals up to the next
+# paren, lone double quote or EOF.  Comments always run to the end of their
+# line and runs of other characters stop at the first character of a comment
+# or string literal, so the pattern does not backtrack.
+SELECT_GAP = r'[^()";]*(?:(?:;[^\n]*(?![^\n])|"[^"\\]*(?:\\.[^"\\]*)*")[^()";]*)*'
+SELECT_GAP_RE = re.compile(SELECT_GAP, re.DOTALL)
+
+# The deepest nesting of lists which ``select_s_exps`` skips with a single
+# match
+SELECT_SKIP_MAX_DEPTH = 32
+
+
+def _make_skip_re(max_depth: int) -> Pattern[str]:
+    """
+    Return a pattern which matches a list whose parens are balanced and nested
+    no deeper than ``max_depth``, ignoring parens in comments and string
+    literals.
+    """
+    pattern = SELECT_GAP
+    for _ in range(max_depth - 1):
+        pattern = SELECT_GAP + r'(?:\(' + pattern + r'\)' + SELECT_GAP + r')*'
+
+    return re.compile(r'\(' + pattern + r'\)', re.DOTALL)
+
+
+SELECT_SKIP_RE = _make_skip_re(SELECT_SKIP_MAX_DEPTH)
+
+# The first word of a list, if the list begins with one, following its opening
+# paren
+SELECT_HEAD_RE = re.compile(r'(?:[ \t\n]|;[^\n]*)*([^ \t\n;()"]*)')
+
+
+def _skip_gap(source_code: str, pos: int) -> int:
+    """
+    Return the offset of the first paren, lone double quote or EOF at or after
+    ``pos`` in ``source_code``.
+    """
+    match = SELECT_GAP_RE.match(source_code, pos)
+    if match is None:
+        raise Exception('Unreachable')
+
+    return match.end()
+
+
+def _get_head(source_code: str, pos: int) -> Optional[str]:
+    """
+    Return the head symbol of the list whose opening paren precedes ``pos`` in
+    ``source_code`` or ``None`` if the list does not begin with a symbol.
+    """
+    match = SELECT_HEAD_RE.match(source_code, pos)
+    if match is None:
+        raise Exception('Unreachable')
+
+    head = match.group(1)
+    if not head or _get_int_base(head) is not None:
+        return None
+
+    return head
+
+
+def _raise_select_eof_error(buf: ParseBuffer, char: str) -> NoReturn:
+    if char == '"':
+        msg = 'reached EOF before termination of string literal'
+    else:
+        msg = 'reached EOF before termination of s-expression'
+
+    buf.raise_error(msg, line_offset=-1, col_offset=-1)
+
+
+def _find_list_end(buf: ParseBuffer, pos: int) -> int:
+    """
+    Return the offset following the closing paren of the list which begins at
+    ``pos`` in the source code of ``buf``.  Only parens, string literals and
+    comments are scanned for, so nothing is decoded or built.
+    """
+    source_code = buf.source_code
+
+    match = SELECT_SKIP_RE.match(source_code, pos)
+    if match is not None:
+        return match.end()
+
+    # Scan deeply nested or unterminated lists one paren at a time
+    depth = 0
+
+    while True:
+        char = source_code[pos:pos + 1]
+
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        else:
+            _raise_select_eof_error(buf, char)
+
+        pos = _skip_gap(source_code, pos + 1)
+
+
+def select_s_exps(str_or_buffer: Union[str, TextIO, BytesLike],
+                  predicate: Callable[[Optional[str], int], bool],
+                  max_depth: int = None,
+                  symbol_table: SymbolTable = None) -> SExprList:
+    """
+    Parse only the lists in the s-expression contained in a string or text
+    buffer for which ``predicate`` returns true.  The predicate is called with
+    the head symbol of each list, or ``None`` if the list does not begin with a
+    symbol, and the depth of the list, where top-level lists have a depth of
+    1.  The lists within a rejected list are searched in turn unless the
+    rejected list is at ``max_depth``, in which case it is skipped by scanning
+    for its closing paren without building any lists or symbols.
+
+    Only selected lists are checked for errors other than unbalanced parens
+    and unterminated string literals.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+    :param predicate: A function of the head symbol and depth of a list which
+        returns whether to parse the list.
+    :param max_depth: The depth below which lists are not searched.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+
+    :returns: A list of the selected lists in the order in which they begin in
+        the source code.
+    """
+    buf = ParseBuffer(str_or_buffer, lazy_positions=True)
+    source_code = buf.source_code
+
+    builder = _FormBuilder(symbol_table)
+    max_depth_ = _get_limit(max_depth)
+
+    selected: SExprList = []
+    depth = 0
+
+    pos = _skip_gap(source_code, 0)
+
+    while pos < len(source_code):
+        char = source_code[pos]
+
+        if char == '(':
+            depth += 1
+
+            if predicate(_get_head(source_code, pos + 1), depth):
+                end = _find_list_end(buf, pos)
+                tokens = TOKEN_RE.findall(source_code, pos, end)
+                selected.extend(builder.feed(buf, tokens, pos))
+            elif depth >= max_depth_:
+                end = _find_list_end(buf, pos)
             else:
-                str_literal += char
+                # Search the items of the list
+                pos = _skip_gap(source_code, pos + 1)
+                continue
+
+            depth -= 1
+            pos = end
+
+        elif char == ')':
+            if depth == 0:
+                buf.seek(pos)
+                buf.raise_error('unexpected closing paren')
+
+            depth -= 1
+            pos += 1
 
         else:
-            raise Exception('Unreachable')
+            _raise_select_eof_error(buf, char)
 
-    if in_str:
-        buf.raise_error(
-            'reached EOF before termination of string literal',
-            line_offset=-1,
-            col_offset=-1,
+        pos = _skip_gap(source_code, pos)
+
+    if depth > 0:
+        _raise_select_eof_error(buf, '')
+
+    return selected
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# The number of characters of the line containing an error before and after
+# the source code being parsed which the chunked parser keeps to show in error
+# messages, so that long lines are not held in memory
+ERROR_LINE_CONTEXT_SIZE = 4096
+
+
+class _ChunkParser:
+    """
+    Parses the s-expression contained in source code which is fed to the
+    parser in chunks.  Each chunk is tokenized up to its last token which
+    cannot be continued by the next chunk.  Up to ``ERROR_LINE_CONTEXT_SIZE``
+    characters of the already tokenized start of the current line are kept to
+    show in error messages.
+    """
+    __slots__ = (
+        'builder',
+        'file_name',
+        'max_input_size',
+        'remaining_size',
+        'max_token_length',
+        'pending',
+        'line_start',
+        'line_start_col_offset',
+        'first_line_offset',
+        'stats',
+        'error',
+        'error_line_end',
+    )
+
+    builder: _FormBuilder
+    file_name: Optional[str]
+    max_input_size: Optional[int]
+    remaining_size: Optional[int]
+    max_token_length: Optional[int]
+    pending: str
+    line_start: str
+    line_start_col_offset: int
+    first_line_offset: int
+    stats: Optional[ParseStats]
+    error: Optional[ParseError]
+    error_line_end: List[str]
+
+    def __init__(self,
+                 symbol_table: Optional[SymbolTable],
+                 file_name: str = None,
+                 limits: ParseLimits = None,
+                 stats: ParseStats = None) -> None:
+        if limits is None:
+            self.builder = _FormBuilder(symbol_table)
+        else:
+            self.builder = _LimitedFormBuilder(limits, symbol_table)
+
+        self.file_name = file_name
+
+        # Number of characters which may still be fed before the input size
+        # limit is exceeded
+        self.max_input_size = None if limits is None else limits.max_input_size
+        self.remaining_size = self.max_input_size
+
+        # Checked against the token which is pending at the end of each chunk
+        # so that an unterminated token does not accumulate indefinitely
+        self.max_token_length = None if limits is None else limits.max_token_length
+
+        # Source code carried over from previous chunks which has yet to be
+        # tokenized
+        self.pending = ''
+
+        # The end of the tokenized source code which precedes the pending
+        # source code on its line and the column offset at which it begins.
+        # If the pending source code begins a line, the line before it is
+        # kept, since errors at EOF are shown on that line if it ends the
+        # source code.
+        self.line_start = ''
+        self.line_start_col_offset = 0
+
+        # Line offset of the first line of the pending source code
+        self.first_line_offset = 0
+
+        self.stats = stats
+
+        # An error which is raised once the line containing it is complete
+        # and the parts of the remainder of that line
+        self.error = None
+        self.error_line_end = []
+
+    def get_read_size(self, chunk_size: int) -> int:
+        """
+        Return the number of characters which should next be fed to the
+        parser.
+        """
+        # Read at least as much as is pending so that long tokens are not
+        # rescanned once per chunk
+        size = max(chunk_size, len(self.pending))
+
+        if self.remaining_size is not None:
+            # Read no more than one character past the limit
+            size = min(size, self.remaining_size + 1)
+
+        return size
+
+    def _get_buffer(self, source_code: str) -> ParseBuffer:
+        return ParseBuffer(
+            source_code,
+            file_name=self.file_name,
+            lazy_positions=True,
+            first_line_offset=self.first_line_offset,
+            prefix=self.line_start,
+            first_col_offset=self.line_start_col_offset,
         )
-    elif symbol_or_int or len(result_stack) > 1:
-        buf.raise_error(
-            'reached EOF before termination of s-expression',
-            line_offset=-1,
-            col_offset=-1,
+
+    def feed(self, chunk: str) -> SExprList:
+        """
+        Parse the next chunk of source code.
+
+        :returns: The top-level items which were completed by the chunk.
+        """
+        pending = self.pending
+
+        source_code = pending + chunk
+        buf = self._get_buffer(source_code)
+
+        remaining_size = self.remaining_size
+        if remaining_size is not None:
+            if len(chunk) > remaining_size:
+                # Show a pending error with the input read up to the limit
+                self._raise_pending_error(chunk[:remaining_size])
+
+                _raise_limit_error(
+                    buf,
+                    len(pending) + remaining_size,
+                    f'exceeded maximum input size ({self.max_input_size})',
+                )
+
+            self.remaining_size = remaining_size - len(chunk)
+
+        if self.error is not None:
+            self._raise_pending_error(chunk, at_eof=False)
+            return []
+
+        endpos = _find_token_boundary(source_code)
+
+        stats = self.stats
+        try:
+            if stats is None:
+                tokens, end = _split_complete_tokens(source_code, 0, endpos)
+                completed = self.builder.feed(buf, tokens)
+            else:
+                tokens, end, completed = self._feed_with_stats(stats, buf, endpos)
+                stats.num_chars += len(chunk)
+                stats.num_bytes += len(chunk.encode('utf-8', 'surrogatepass'))
+
+            self._check_pending_token(buf, end)
+        except ParseError as e:
+            if e._is_line_complete():
+                raise
+
+            # Raise the error once the remainder of its line has been read
+            self.error = e
+            self.pending = ''
+            return []
+
+        # Keep the start of the current line, or the last line if it ends the
+        # source code, for error messages.  As with ``str.splitlines``, a
+        # trailing newline does not begin a line.
+        keep_from = min(
+            source_code.rfind('\n', 0, end) + 1,
+            source_code.rfind('\n', 0, len(source_code) - 1) + 1,
         )
 
-    return result_stack[0]
+        if keep_from > 0:
+            self.line_start = ''
+            self.line_start_col_offset = 0
+
+        line_start = self.line_start + source_code[keep_from:end]
+
+        if len(line_start) > ERROR_LINE_CONTEXT_SIZE:
+            cut = len(line_start) - ERROR_LINE_CONTEXT_SIZE
+            first_line_start = line_start.rfind('\n', 0, cut) + 1
+
+            if first_line_start > 0:
+                self.line_start_col_offset = cut - first_line_start
+            else:
+                self.line_start_col_offset += cut
+
+            line_start = line_start[cut:]
+
+        self.line_start = line_start
+
+        self.first_line_offset += source_code.count('\n', 0, end)
+        self.pending = source_code[end:]
+
+        return completed
+
+    def _check_pending_token(self, buf: ParseBuffer, start: int) -> None:
+        """
+        Raise a parse limit error if the incomplete token at offset ``start`` in
+        the source code of ``buf`` is already longer than allowed.  Comments
+        are not tokens and so are not limited.
+        """
+        max_token_length = self.max_token_length
+        source_code = buf.source_code
+
+        if max_token_length is None or len(source_code) - start <= max_token_length:
+            return
+
+        if source_code[start] != ';':
+            _raise_limit_error(
+                buf, start, f'exceeded maximum token length ({max_token_length})',
+            )
+
+    def _feed_with_stats(self,
+                         stats: ParseStats,
+                         buf: ParseBuffer,
+                         endpos: int) -> Tuple[List[str], int, SExprList]:
+        builder = self.builder
+        depth = len(builder.result_stack) - 1
+        num_atoms = len(builder.atoms)
+
+        start = time.perf_counter()
+        tokens, end = _split_complete_tokens(buf.source_code, 0, endpos)
+        tokenized = time.perf_counter()
+        completed = builder.feed(buf, tokens)
+        built = time.perf_counter()
+
+        stats.tokenize_time += tokenized - start
+        stats.build_time += built - tokenized
+        stats.num_decoded_words += len(builder.atoms) - num_atoms
+        stats._count_tokens(tokens, builder.atoms, depth)
+
+        return tokens, end, completed
+
+    def _raise_pending_error(self, text: str = '', at_eof: bool = True) -> None:
+        """
+        Add ``text``, which follows the source code fed so far, to the line
+        containing a pending error and raise the error if the line is complete,
+        enough of it has been read to show in the error message or ``at_eof``
+        is true.
+        """
+        error = self.error
+        if error is None:
+            return
+
+        line_end, newline, _ = text.partition('\n')
+        self.error_line_end.append(line_end[:ERROR_LINE_CONTEXT_SIZE])
+
+        num_chars = sum(len(part) for part in self.error_line_end)
+
+        if newline or at_eof or num_chars >= ERROR_LINE_CONTEXT_SIZE:
+            error._extend_source(''.join(self.error_line_end))
+            raise error
+
+    def raise_decode_error(self, text: str, line_end: str, reason: str) -> NoReturn:
+        """
+        Raise a parse error for an undecodable byte which follows ``text`` in
+        the source code.  ``line_end`` is the remainder of the line containing
+        the byte, which is only used in the error message.
+        """
+        self._raise_pending_error(text)
+
+        source_code = self.pending + text
+
+        buf = self._get_buffer(source_code + line_end)
+        buf.seek(len(source_code))
+        buf.raise_error(f'invalid utf-8 in source code: {reason}')
+
+    def close(self) -> SExprList:
+        """
+        Parse the remaining source code at EOF.
+
+        :returns: The remaining top-level items.
+        """
+        self._raise_pending_error()
+
+        buf = self._get_buffer(self.pending)
+
+        stats = self.stats
+        if stats is None:
+            return self.builder.close(buf)
+
+        # Only the final token of the source code remains, so the tokens are
+        # simply found again to be counted
+        tokens = TOKEN_RE.findall(buf.source_code)
+
+        builder = self.builder
+        depth = len(builder.result_stack) - 1
+        num_atoms = len(builder.atoms)
+
+        start = time.perf_counter()
+        completed = builder.close(buf)
+
+        stats.build_time += time.perf_counter() - start
+        stats.num_decoded_words += len(builder.atoms) - num_atoms
+        stats._count_tokens(tokens, builder.atoms, depth)
+
+        return completed
+
+
+def _iter_s_exps(read: Callable[[int], str],
+                 chunk_size: int,
+                 symbol_table: Optional[SymbolTable],
+                 file_name: str = None,
+                 limits: ParseLimits = None,
+                 stats: ParseStats = None) -> Iterator[Any]:
+    """
+    Incrementally parse the s-expression contained in the source code returned
+    by successive calls to ``read``.  Each call is given the number of
+    characters to read and an empty string marks EOF.
+    """
+    parser = _ChunkParser(symbol_table, file_name, limits, stats)
+
+    while True:
+        chunk = read(parser.get_read_size(chunk_size))
+        if not chunk:
+            break
+
+        yield from parser.feed(chunk)
+
+    yield from parser.close()
+
+
+def _get_str_reader(source_code: str) -> Callable[[int], str]:
+    """
+    Return a function which reads successive chunks of ``source_code`` in the
+    manner of ``TextIO.read``.
+    """
+    index = 0
+
+    def read(size: int) -> str:
+        nonlocal index
+
+        chunk = source_code[index:index + size]
+        index += len(chunk)
+
+        return chunk
+
+    return read
+
+
+# The number of bytes of a mapped file to scan at a time when counting lines
+LINE_COUNT_CHUNK_SIZE = 1024 * 1024
+
+
+def _count_newlines(data: 'Union[bytes, bytearray, mmap.mmap]', end: int) -> int:
+    """
+    Return the number of newlines in ``data`` before the byte offset ``end``
+    without copying all of it at once.
+    """
+    count = 0
+
+    for start in range(0, end, LINE_COUNT_CHUNK_SIZE):
+        count += data[start:min(start + LINE_COUNT_CHUNK_SIZE, end)].count(b'\n')
+
+    return count
+
+
+def _raise_decode_error(data: 'Union[BytesLike, mmap.mmap]',
+                        index: int,
+                        reason: str,
+                        file_name: Optional[str]) -> NoReturn:
+    """
+    Raise a parse error for the undecodable byte at offset ``index`` in
+    ``data``.  Only the line containing the byte is decoded.
+    """
+    if isinstance(data, memoryview):
+        # Views cannot be searched, but only need to be copied on error
+        data = data.tobytes()
+
+    line_start = data.rfind(b'\n', 0, index) + 1
+    line_end = data.find(b'\n', index)
+    if line_end == -1:
+        line_end = len(data)
+
+    line = data[line_start:line_end].decode('utf-8', 'replace')
+    col_offset = len(data[line_start:index].decode('utf-8', 'replace'))
+
+    buf = ParseBuffer(
+        line,
+        file_name=file_name,
+        first_line_offset=_count_newlines(data, line_start),
+    )
+    buf.raise_error(f'invalid utf-8 in source code: {reason}', 0, col_offset)
+
+
+def _get_byte_data(data: BytesLike) -> BytesLike:
+    """
+    Return bytes-like source code as an object which can be sliced and
+    measured in bytes.
+    """
+    if isinstance(data, memoryview):
+        return data.cast('B')
+    return data
+
+
+def _decode_bytes(data: BytesLike, file_name: str = None) -> str:
+    """
+    Decode utf-8 encoded source code, raising a parse error for any
+    undecodable byte.
+    """
+    try:
+        return str(data, 'utf-8')
+    except UnicodeDecodeError as e:
+        _raise_decode_error(data, e.start, e.reason, file_name)
+
+
+def _get_bytes_reader(data: 'Union[BytesLike, mmap.mmap]',
+                      file_name: str = None) -> Callable[[int], str]:
+    """
+    Return a function which decodes successive chunks of the utf-8 encoded
+    source code in ``data`` in the manner of ``TextIO.read``.  Chunks are
+    measured in bytes rather than characters.
+    """
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    index = 0
+
+    def read(size: int) -> str:
+        nonlocal index
+
+        while index < len(data):
+            # Offset of the first byte which has not yet been decoded
+            decoded_end = index - len(decoder.getstate()[0])
+
+            chunk = data[index:index + size]
+            index += len(chunk)
+
+            try:
+                text = decoder.decode(chunk, final=index == len(data))
+            except UnicodeDecodeError as e:
+                _raise_decode_error(data, decoded_end + e.start, e.reason, file_name)
+
+            # A chunk may end partway through a multi-byte character
+            if text:
+                return text
+
+        return ''
+
+    return read
+
+
+def _iter_byte_stream_s_exps(stream: BinaryIO,
+                             chunk_size: int,
+                             symbol_table: Optional[SymbolTable],
+                             file_name: str = None,
+                             limits: ParseLimits = None,
+                             stats: ParseStats = None) -> Iterator[Any]:
+    """
+    Incrementally parse the s-expression contained in the utf-8 encoded
+    source code read from a binary stream.
+    """
+    parser = _ChunkParser(symbol_table, file_name, limits, stats)
+    decoder = codecs.getincrementaldecoder('utf-8')()
+
+    at_eof = False
+
+    while not at_eof:
+        data = stream.read(parser.get_read_size(chunk_size))
+        at_eof = not data
+
+        try:
+            chunk = decoder.decode(data, final=at_eof)
+        except UnicodeDecodeError as e:
+            parser.raise_decode_error(
+                e.object[:e.start].decode('utf-8'),
+                e.object[e.start:].split(b'\n', 1)[0].decode('utf-8', 'replace'),
+                e.reason,
+            )
+
+        if chunk:
+            yield from parser.feed(chunk)
+
+    yield from parser.close()
+
+
+def parse_file(path: Union[str, 'os.PathLike[str]'],
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               symbol_table: SymbolTable = None,
+               limits: ParseLimits = None,
+               stats: ParseStats = None) -> SExprList:
+    """
+    Parse the s-expression contained in a utf-8 encoded file.  The file is
+    memory-mapped and decoded a chunk at a time as it is scanned so that no
+    decoded copy of the whole file is held in memory.  Parse errors report
+    ``path`` as their file name.
+
+    :param path: The path of the file to parse.
+    :param chunk_size: The number of bytes to decode and scan at a time.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+    :param limits: Optional limits on the resources used to parse the file.
+    :param stats: An optional ``ParseStats`` to which counters describing the
+        file are added.
+
+    :returns: The python list representation of the parsed s-expression.
+    """
+    file_name = os.fspath(path)
+
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # Empty files cannot be mapped and special files such as pipes or
+            # those in procfs may have no size but still have contents
+            return list(_iter_byte_stream_s_exps(
+                f,
+                chunk_size,
+                symbol_table,
+                file_name,
+                limits,
+                stats,
+            ))
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            read = _get_bytes_reader(data, file_name)
+            return list(_iter_s_exps(read, chunk_size, symbol_table, file_name, limits, stats))
+
+
+def iter_parse(stream: TextIO,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               symbol_table: SymbolTable = None,
+               limits: ParseLimits = None,
+               stats: ParseStats = None) -> Iterator[Any]:
+    """
+    Incrementally parse the s-expression contained in a readable text stream.
+    The stream is read in chunks of roughly ``chunk_size`` characters.  Only
+    the incomplete forms and the source code of the current line and of any
+    string literal which spans it are held in memory between chunks.
+
+    :param stream: A readable text stream containing an s-expression.
+    :param chunk_size: The number of characters to read from the stream at a
+        time.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+    :param limits: Optional limits on the resources used to parse the
+        s-expression.  No more than one character past ``max_input_size`` is
+        read from the stream.
+    :param stats: An optional ``ParseStats`` to which counters describing the
+        source code are added as it is parsed.
+
+    :returns: An iterator over the top-level items in the parsed s-expression,
+        each of which is yielded once it has been completed.
+    """
+    return _iter_s_exps(stream.read, chunk_size, symbol_table, limits=limits, stats=stats)
+
+
+def iter_s_exps(str_or_buffer: Union[str, TextIO, BytesLike],
+                chunk_size: int = DEFAULT_CHUNK_SIZE,
+                symbol_table: SymbolTable = None,
+                limits: ParseLimits = None,
+                stats: ParseStats = None) -> Iterator[Any]:
+    """
+    Iterate over the top-level items in the s-expression contained in a string
+    or text buffer.  Unlike ``parse_s_exp``, each item is yielded as soon as
+    the chunk of ``chunk_size`` characters in which it is completed has been
+    scanned and any ``ParseError`` is raised once the iterator reaches it.
+
+    :param str_or_buffer: A string, text buffer or bytes-like object of utf-8
+        encoded source code containing an s-expression.
+    :param chunk_size: The number of characters to scan at a time.
+    :param symbol_table: An optional table in which to intern parsed symbols.
+    :param limits: Optional limits on the resources used to parse the
+        s-expression.
+    :param stats: An optional ``ParseStats`` to which counters describing the
+        source code are added as it is parsed.
+
+    :returns: An iterator over the top-level items in the parsed s-expression.
+    """
+    if isinstance(str_or_buffer, str):
+        read = _get_str_reader(str_or_buffer)
+    elif isinstance(str_or_buffer, io.TextIOBase):
+        read = str_or_buffer.read
+    elif isinstance(str_or_buffer, (bytes, bytearray, memoryview)):
+        read = _get_bytes_reader(_get_byte_data(str_or_buffer))
+    else:
+        raise ValueError('unsupported input type for buffer')
+
+    return _iter_s_exps(read, chunk_size, symbol_table, limits=limits, stats=stats)
@@ -0,0 +1,271 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TextIO,
+)
+
+from lll.parser import (
+    DIGIT_CHARS,
+    WORD_TERMINATORS,
+    SExprList,
+    Symbol,
+)
+
+
+# The number of pieces of output which are joined before being written
+WRITE_BUFFER_SIZE = 8192
+
+DEFAULT_WIDTH = 80
+
+STR_ESCAPE_TABLE = str.maketrans({
+    '"': '\\"',
+    '\\': '\\\\',
+    '\n': '\\n',
+    '\t': '\\t',
+})
+
+
+def _encode_symbol(symbol: str) -> str:
+    if not symbol or not WORD_TERMINATORS.isdisjoint(symbol):
+        raise ValueError(f'symbol cannot be printed: {repr(symbol)}')
+
+    # Words which begin like int literals are parsed as ints
+    if symbol[0] in DIGIT_CHARS or (symbol[0] == '-' and symbol[1:2] in DIGIT_CHARS):
+        raise ValueError(f'symbol cannot be printed: {repr(symbol)}')
+
+    return symbol
+
+
+def _encode_str(value: str) -> str:
+    return '"' + value.translate(STR_ESCAPE_TABLE) + '"'
+
+
+def _make_atom_encoder() -> Callable[[Any], str]:
+    """
+    Return a function which encodes atoms as LLL source code.  Symbols and
+    strings are encoded once per encoder.
+    """
+    symbols: Dict[str, str] = {}
+    strs: Dict[str, str] = {}
+
+    def encode(item: Any) -> str:
+        if isinstance(item, Symbol):
+            encoded = symbols.get(item)
+            if encoded is None:
+                encoded = symbols[item] = _encode_symbol(item)
+            return encoded
+
+        elif isinstance(item, str):
+            encoded = strs.get(item)
+            if encoded is None:
+                encoded = strs[item] = _encode_str(item)
+            return encoded
+
+        elif isinstance(item, int):
+            return str(item)
+
+        raise TypeError(f'unsupported s-expression item: {repr(item)}')
+
+    return encode
+
+
+def _get_width(s_exp: SExprList, encode: Callable[[Any], str], max_width: int) -> int:
+    """
+    Return the width of a list written on a single line or any width greater
+    than ``max_width`` if it would be wider than that.
+    """
+    width = 1
+    stack = [iter(s_exp)]
+
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, list):
+                width += 2
+            else:
+                width += len(encode(item)) + 1
+
+            # Stop as soon as the limit is passed so that finding the width of
+            # each list of a deeply nested list is not quadratic
+            if width > max_width:
+                return width
+
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
+
+        else:
+            stack.pop()
+
+    return width
+
+
+def _encode_line(s_exp: SExprList, encode: Callable[[Any], str]) -> str:
+    """
+    Return a list written on a single line.  Only used for lists narrow enough
+    to fit on a line, so the recursion is shallow.
+    """
+    return '(' + ' '.join(
+        _encode_line(item, encode) if isinstance(item, list) else encode(item)
+        for item in s_exp
+    ) + ')'
+
+
+def _iter_compact_chunks(s_exp: SExprList) -> Iterator[str]:
+    encode = _make_atom_encoder()
+
+    parts: List[str] = []
+    append = parts.append
+
+    stack = [iter(s_exp)]
+    first = True
+
+    while True:
+        if len(parts) >= WRITE_BUFFER_SIZE:
+            yield ''.join(parts)
+            parts.clear()
+
+        # Top-level items are written one per line
+        sep = ' ' if len(stack) > 1 else '\n'
+
+        for item in stack[-1]:
+            if first:
+                first = False
+            else:
+                append(sep)
+
+            if isinstance(item, list):
+                append('(')
+                stack.append(iter(item))
+                first = True
+                break
+
+            append(encode(item))
+
+        else:
+            stack.pop()
+            if not stack:
+                break
+
+            append(')')
+            first = False
+
+    if s_exp:
+        append('\n')
+
+    yield ''.join(parts)
+
+
+def _iter_indented_chunks(s_exp: SExprList, indent: int, width: int) -> Iterator[str]:
+    encode = _make_atom_encoder()
+
+    parts: List[str] = []
+    append = parts.append
+
+    # Each frame holds an iterator over the items of a list, the prefix of the
+    # lines of its items, and whether the atoms at the head of the list are
+    # still being written on its first line
+    frames: List[List[Any]] = [[iter(s_exp), '\n', False]]
+    first = True
+
+    while frames:
+        if len(parts) >= WRITE_BUFFER_SIZE:
+            yield ''.join(parts)
+            parts.clear()
+
+        frame = frames[-1]
+        prefix = frame[1]
+
+        for item in frame[0]:
+            is_list = isinstance(item, list)
+
+            if frame[2] and not is_list:
+                if not first:
+                    append(' ')
+                first = False
+
+                append(encode(item))
+                continue
+
+            frame[2] = False
+
+            # The first item of the output or of a list without head atoms
+            # follows on the same line
+            if first:
+                first = False
+            else:
+                append(prefix)
+
+            if not is_list:
+                append(encode(item))
+                continue
+
+            max_width = width - len(prefix) + 1
+            if _get_width(item, encode, max_width) <= max_width:
+                append(_encode_line(item, encode))
+                continue
+
+            append('(')
+            frames.append([iter(item), prefix + ' ' * indent, True])
+            first = True
+            break
+
+        else:
+            frames.pop()
+            if frames:
+                append(')')
+
+    if s_exp:
+        append('\n')
+
+    yield ''.join(parts)
+
+
+def _iter_chunks(s_exp: SExprList, indent: Optional[int], width: int) -> Iterator[str]:
+    if indent is None:
+        return _iter_compact_chunks(s_exp)
+    return _iter_indented_chunks(s_exp, indent, width)
+
+
+def dump(s_exp: SExprList,
+         stream: TextIO,
+         indent: int = None,
+         width: int = DEFAULT_WIDTH) -> None:
+    """
+    Write the LLL source code of a parsed s-expression to a text stream.  The
+    output is buffered and written to the stream in large chunks.
+
+    :param s_exp: The python list representation of an s-expression, as
+        returned by ``parse_s_exp``.
+    :param stream: A writable text stream.
+    :param indent: If ``None``, each top-level item is written on a single
+        line.  Otherwise, lists which do not fit within ``width`` columns are
+        broken over several lines with their items indented by this many
+        spaces.
+    :param width: The number of columns within which lists are kept on a
+        single line when ``indent`` is given.
+    """
+    for chunk in _iter_chunks(s_exp, indent, width):
+        stream.write(chunk)
+
+
+def dumps(s_exp: SExprList, indent: int = None, width: int = DEFAULT_WIDTH) -> str:
+    """
+    Return the LLL source code of a parsed s-expression.  Parsing the source
+    code with ``parse_s_exp`` gives back an equal s-expression.
+
+    :param s_exp: The python list representation of an s-expression, as
+        returned by ``parse_s_exp``.
+    :param indent: If ``None``, each top-level item is written on a single
+        line.  Otherwise, lists which do not fit within ``width`` columns are
+        broken over several lines with their items indented by this many
+        spaces.
+    :param width: The number of columns within which lists are kept on a
+        single line when ``indent`` is given.
+
+    :returns: The LLL source code of the s-expression.
+    """
+    return ''.join(_iter_chunks(s_exp, indent, width))
@@ -0,0 +1,251 @@
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+)
+import weakref
+
+from lll.parser import (
+    SExprList,
+    Symbol,
+)
+
+
+def iter_preorder(node: Any) -> Iterator[Any]:
+    """
+    Iterate over a node of a parsed s-expression and all of its descendants,
+    yielding each list before its items.
+
+    :param node: A list or atom of a parsed s-expression.
+
+    :returns: An iterator over the node and its descendants in pre-order.
+    """
+    yield node
+
+    if not isinstance(node, list):
+        return
+
+    stack = [iter(node)]
+
+    while stack:
+        for item in stack[-1]:
+            yield item
+
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
+
+        else:
+            stack.pop()
+
+
+def iter_postorder(node: Any) -> Iterator[Any]:
+    """
+    Iterate over a node of a parsed s-expression and all of its descendants,
+    yielding each list after its items.
+
+    :param node: A list or atom of a parsed s-expression.
+
+    :returns: An iterator over the node and its descendants in post-order.
+    """
+    if not isinstance(node, list):
+        yield node
+        return
+
+    stack = [(node, iter(node))]
+
+    while stack:
+        for item in stack[-1][1]:
+            if isinstance(item, list):
+                stack.append((item, iter(item)))
+                break
+
+            yield item
+
+        else:
+            yield stack.pop()[0]
+
+
+HANDLER_PREFIXES = ('visit_', 'leave_', 'transform_')
+
+# Names of handlers, following their prefixes, which handle all lists or atoms
+# rather than lists with a particular head symbol
+GENERIC_HANDLER_NAMES = ('list', 'atom')
+
+Handlers = Dict[Optional[str], Callable[[Any, SExprList], Any]]
+
+# The handler methods of each walker class by method name prefix and the head
+# symbol they handle, with the generic list handler under ``None``.  Classes
+# are only weakly referenced so that the handlers of classes which are no
+# longer used are dropped.
+_handler_tables: 'weakref.WeakKeyDictionary[type, Dict[str, Handlers]]' = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_handlers(walker_class: type, prefix: str) -> Handlers:
+    """
+    Return the handler methods of a walker class whose names begin with
+    ``prefix`` by the head symbol they handle.  The methods of each class are
+    only looked up once.
+    """
+    try:
+        tables = _handler_tables[walker_class]
+    except KeyError:
+        tables = {p: {} for p in HANDLER_PREFIXES}
+
+        for name in dir(walker_class):
+            for p in HANDLER_PREFIXES:
+                if name.startswith(p) and name[len(p):] not in GENERIC_HANDLER_NAMES:
+                    tables[p][name[len(p):]] = getattr(walker_class, name)
+
+        for p, handlers in tables.items():
+            generic_handler = getattr(walker_class, p + 'list', None)
+            if generic_handler is not None:
+                handlers[None] = generic_handler
+
+        _handler_tables[walker_class] = tables
+
+    return tables[prefix]
+
+
+def _get_handler(handlers: Handlers, node: SExprList) -> Callable[[Any, SExprList], Any]:
+    """
+    Return the handler method for a list, which is the method named after the
+    head symbol of the list if there is one or the generic list method
+    otherwise.
+    """
+    if node and isinstance(node[0], Symbol):
+        head = node[0]
+
+        handler = handlers.get(head)
+        if handler is None and '-' in head:
+            handler = handlers.get(head.replace('-', '_'))
+
+        if handler is not None:
+            return handler
+
+    return handlers[None]
+
+
+class Visitor:
+    """
+    Walks a parsed s-expression without recursion, calling a handler method
+    for each list and atom.
+
+    Handlers for a list whose head is the symbol ``name`` are looked up as
+    ``visit_<name>``, which is called before the items of the list are
+    visited, and ``leave_<name>``, which is called after.  Dashes in ``name``
+    are replaced by underscores.  Lists without such handlers are passed to
+    ``visit_list`` and ``leave_list`` and atoms are passed to ``visit_atom``.
+    If a ``visit_`` handler returns ``False``, the items of the list are
+    skipped.
+    """
+    def visit(self, node: Any) -> None:
+        """
+        Visit a node of a parsed s-expression and all of its descendants.
+        """
+        if not isinstance(node, list):
+            self.visit_atom(node)
+            return
+
+        visit_handlers = _get_handlers(type(self), 'visit_')
+        leave_handlers = _get_handlers(type(self), 'leave_')
+
+        stack = [(node, self._enter(visit_handlers, node))]
+
+        while stack:
+            for item in stack[-1][1]:
+                if isinstance(item, list):
+                    stack.append((item, self._enter(visit_handlers, item)))
+                    break
+
+                self.visit_atom(item)
+
+            else:
+                node = stack.pop()[0]
+                _get_handler(leave_handlers, node)(self, node)
+
+    def _enter(self, visit_handlers: Handlers, node: SExprList) -> Iterator[Any]:
+        if _get_handler(visit_handlers, node)(self, node) is False:
+            return iter(())
+        return iter(node)
+
+    def visit_list(self, node: SExprList) -> Optional[bool]:
+        return None
+
+    def leave_list(self, node: SExprList) -> None:
+        pass
+
+    def visit_atom(self, atom: Any) -> None:
+        pass
+
+
+class Transformer:
+    """
+    Rebuilds a parsed s-expression from the bottom up without recursion.
+
+    Each atom is passed to ``transform_atom`` and each list, once its items
+    have been transformed, to ``transform_<name>`` if its head is the symbol
+    ``name`` or to ``transform_list`` otherwise.  Dashes in ``name`` are
+    replaced by underscores.  Each handler returns the node which replaces the
+    one it was given.  A list is only copied if one of its items was replaced,
+    so unchanged subtrees are shared with the original s-expression.
+    """
+    def transform(self, node: Any) -> Any:
+        """
+        Return a node of a parsed s-expression with all of its descendants
+        transformed.
+        """
+        if not isinstance(node, list):
+            return self.transform_atom(node)
+
+        handlers = _get_handlers(type(self), 'transform_')
+
+        # Each frame holds a list, an iterator over its items, the index of the
+        # list in its parent, and the transformed items of the list once one of
+        # them has been replaced
+        stack: List[List[Any]] = [[node, enumerate(node), 0, None]]
+
+        while True:
+            frame = stack[-1]
+
+            for index, item in frame[1]:
+                if isinstance(item, list):
+                    stack.append([item, enumerate(item), index, None])
+                    break
+
+                self._add_item(frame, index, item, self.transform_atom(item))
+
+            else:
+                node, _, index, new_items = stack.pop()
+                if new_items is not None:
+                    node = new_items
+
+                result = _get_handler(handlers, node)(self, node)
+
+                if not stack:
+                    return result
+
+                parent = stack[-1]
+                self._add_item(parent, index, parent[0][index], result)
+
+    @staticmethod
+    def _add_item(frame: List[Any], index: int, item: Any, result: Any) -> None:
+        new_items = frame[3]
+
+        if new_items is None:
+            if result is item:
+                return
+            new_items = frame[3] = frame[0][:index]
+
+        new_items.append(result)
+
+    def transform_list(self, node: SExprList) -> Any:
+        return node
+
+    def transform_atom(self, atom: Any) -> Any:
+        return atom
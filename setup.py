@@ -59,7 +59,7 @@ setup(
     license="MIT",
     zip_safe=False,
     keywords='ethereum',
-    packages=find_packages(exclude=["tests", "tests.*"]),
+    packages=find_packages(exclude=["tests", "tests.*", "benchmarks", "benchmarks.*"]),
     classifiers=[
         'Development Status :: 3 - Alpha',
         'Intended Audience :: Developers',
@@ -0,0 +1,110 @@
+import asyncio
+from concurrent.futures import (
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+
+import pytest
+
+from lll.aio import (
+    aiter_s_exps,
+    aparse,
+)
+from lll.exceptions import (
+    ParseError,
+    ParseLimitError,
+)
+from lll.parser import (
+    ParseLimits,
+    parse_s_exp,
+)
+
+
+def run(coro_func, data, pieces=1):
+    """
+    Run ``coro_func`` with a stream reader which is fed ``data`` in
+    ``pieces`` parts as the coroutine reads from it.
+    """
+    async def main():
+        reader = asyncio.StreamReader()
+
+        async def feed():
+            size = -(-len(data) // pieces) if data else 1
+            for start in range(0, len(data), size):
+                reader.feed_data(data[start:start + size])
+                await asyncio.sleep(0)
+            reader.feed_eof()
+
+        feeder = asyncio.ensure_future(feed())
+        try:
+            return await coro_func(reader)
+        finally:
+            await feeder
+
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(main())
+    finally:
+        loop.close()
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 1024))
+@pytest.mark.parametrize('pieces', (1, 3, 100))
+def test_aparse_matches_parse_s_exp(get_fixture_contents, chunk_size, pieces):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+
+    s_exp = run(lambda reader: aparse(reader, chunk_size), source_code.encode('utf-8'), pieces)
+
+    assert s_exp == parse_s_exp(source_code)
+
+
+def test_aiter_s_exps_yields_completed_items():
+    async def collect(reader):
+        return [item async for item in aiter_s_exps(reader, chunk_size=4)]
+
+    assert run(collect, b'(a "\xc3\xa9")\n(b 1)\nc\n', pieces=20) == [['a', 'é'], ['b', 1], 'c']
+
+
+def test_aparse_with_executor(get_fixture_contents):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+
+    with ThreadPoolExecutor(1) as executor:
+        s_exp = run(lambda reader: aparse(reader, 256, executor=executor), source_code.encode())
+
+    assert s_exp == parse_s_exp(source_code)
+
+
+def test_aparse_rejects_process_executors():
+    with ProcessPoolExecutor(1) as executor:
+        with pytest.raises(TypeError):
+            run(lambda reader: aparse(reader, 16, executor=executor), b'(a (b c))' * 10)
+
+
+def test_aparse_reports_parse_errors():
+    source_code = '(a b)\n(c 0xg)\n'
+
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(source_code)
+
+    with pytest.raises(ParseError) as excinfo:
+        run(lambda reader: aparse(reader, chunk_size=3), source_code.encode(), pieces=5)
+
+    assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+@pytest.mark.parametrize('pieces', (1, 4))
+def test_aparse_reports_decode_errors(pieces):
+    with pytest.raises(ParseError) as excinfo:
+        run(lambda reader: aparse(reader, chunk_size=4), b'(a)\n(b \xff c)\n', pieces)
+
+    # Only the part of the line which has been read is shown
+    assert str(excinfo.value) == (
+        'line 2:4: invalid utf-8 in source code: invalid start byte\n'
+        '(b �\n'
+        '   ^'
+    )
+
+
+def test_aparse_limits():
+    with pytest.raises(ParseLimitError, match='exceeded maximum input size'):
+        run(lambda reader: aparse(reader, limits=ParseLimits(max_input_size=10)), b'(a)\n' * 10)
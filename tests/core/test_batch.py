@@ -0,0 +1,84 @@
+import pickle
+
+import pytest
+
+from lll.batch import (
+    parse_many,
+)
+from lll.exceptions import (
+    ParseError,
+)
+from lll.parser import (
+    parse_s_exp,
+)
+
+
+@pytest.fixture
+def fixture_paths(tmp_path, get_fixture_contents):
+    sources = [
+        get_fixture_contents('ENS.lll.lisp'),
+        '(seq\n  (foo 0xzz))\n',
+        get_fixture_contents('string_literals.lll.lisp'),
+        '(seq\n  (foo "bar))\n',
+    ] + [f'(foo {i})\n' for i in range(10)]
+
+    paths = []
+    for i, source_code in enumerate(sources):
+        path = tmp_path / f'{i}.lll'
+        path.write_text(source_code)
+        paths.append(path)
+
+    return paths
+
+
+def get_expected_result(path):
+    with open(path, 'r') as f:
+        source_code = f.read()
+
+    try:
+        return parse_s_exp(source_code), None
+    except ParseError as e:
+        e.file_name = str(path)
+        return None, str(e)
+
+
+@pytest.mark.parametrize('workers', (1, 2))
+def test_parse_many_ordered(fixture_paths, workers):
+    results = list(parse_many(fixture_paths, workers=workers))
+
+    assert [result.path for result in results] == [str(path) for path in fixture_paths]
+
+    for path, result in zip(fixture_paths, results):
+        expected_s_exp, expected_error = get_expected_result(path)
+
+        assert result.s_exp == expected_s_exp
+        assert repr(result.s_exp) == repr(expected_s_exp)
+
+        if expected_error is None:
+            assert result.error is None
+        else:
+            assert str(result.error) == expected_error
+            assert str(result.error).startswith(str(path) + ':')
+
+
+def test_parse_many_unordered(fixture_paths):
+    results = list(parse_many(fixture_paths, workers=2, ordered=False))
+
+    assert sorted(result.path for result in results) == sorted(
+        str(path) for path in fixture_paths
+    )
+    for result in results:
+        assert (result.s_exp is None) != (result.error is None)
+
+
+def test_parse_error_pickles_only_error_line():
+    source_code = '(seq\n' + '  (foo 1)\n' * 1000 + '  (bar 0xzz))\n'
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp(source_code)
+    error = excinfo.value
+
+    unpickled = pickle.loads(pickle.dumps(error))
+
+    assert str(unpickled) == str(error)
+    assert unpickled.source_lines == ['  (bar 0xzz))']
@@ -0,0 +1,35 @@
+import pytest
+
+from benchmarks.corpora import (
+    CORPORA,
+)
+from benchmarks.suite import (
+    BENCHMARKS,
+    count_forms,
+    run_benchmark,
+)
+from lll.parser import (
+    parse_s_exp,
+)
+
+
+@pytest.mark.parametrize('corpus_name', sorted(CORPORA))
+def test_corpora_are_parseable(corpus_name):
+    source_code = CORPORA[corpus_name](10000)
+
+    assert len(source_code) >= 5000
+    assert count_forms(parse_s_exp(source_code)) > 0
+
+
+@pytest.mark.parametrize('benchmark_name', sorted(BENCHMARKS))
+def test_run_benchmark(benchmark_name):
+    result = run_benchmark(BENCHMARKS[benchmark_name], CORPORA['ens'](10000), repeat=1)
+
+    assert result.seconds > 0
+    assert result.mb_per_sec > 0
+    assert result.forms_per_sec > 0
+    assert result.peak_memory > 0
+
+
+def test_count_forms():
+    assert count_forms(parse_s_exp('(foo (bar) baz) (qux)\n')) == 3
@@ -0,0 +1,129 @@
+import io
+
+import pytest
+
+from lll import (
+    binary,
+)
+from lll.binary import (
+    MAGIC,
+    decode,
+    encode,
+    iter_decode,
+)
+from lll.parser import (
+    Symbol,
+    SymbolTable,
+    parse_s_exp,
+)
+from lll.printer import (
+    dumps,
+)
+
+
+def encode_to_bytes(s_exp):
+    stream = io.BytesIO()
+    encode(s_exp, stream)
+
+    return stream.getvalue()
+
+
+def test_decode_matches_parse(parseable_lll_file):
+    with open(parseable_lll_file, 'r') as f:
+        s_exp = parse_s_exp(f)
+
+    decoded = decode(io.BytesIO(encode_to_bytes(s_exp)))
+
+    assert decoded == s_exp
+    assert dumps(decoded) == dumps(s_exp)
+
+
+@pytest.mark.parametrize(
+    's_exp',
+    (
+        [],
+        [[]],
+        [Symbol('foo'), 'foo', 1, [Symbol('foo'), 'foo', [1]]],
+        [0, -1, 2 ** 256, -(2 ** 256), 0x20],
+        ['', 'a\nb', 'ünïcödé ✓', 'x' * 100000],
+        [Symbol('ünï'), Symbol("'quoted")],
+    ),
+)
+def test_encode_round_trips(s_exp):
+    decoded = decode(io.BytesIO(encode_to_bytes(s_exp)))
+
+    assert decoded == s_exp
+    assert [type(item) for item in decoded] == [type(item) for item in s_exp]
+
+
+def test_encode_deeply_nested_lists():
+    depth = 100000
+    s_exp = parse_s_exp('(seq ' * depth + '1' + ')' * depth + '\n')
+
+    decoded = decode(io.BytesIO(encode_to_bytes(s_exp)))
+
+    assert dumps(decoded) == dumps(s_exp)
+
+
+def test_atoms_are_encoded_once():
+    data = encode_to_bytes([[Symbol('some-long-symbol'), 'some long string']] * 100)
+
+    assert data.count(b'some-long-symbol') == 1
+    assert data.count(b'some long string') == 1
+
+
+def test_decode_interns_symbols():
+    s_exp = [Symbol('foo'), [Symbol('bar')]]
+    data = encode_to_bytes(s_exp)
+    symbol_table = SymbolTable()
+
+    first = decode(io.BytesIO(data), symbol_table)
+    second = decode(io.BytesIO(data), symbol_table)
+
+    assert first == s_exp
+    assert first[0] is second[0]
+    assert first[1][0] is second[1][0]
+
+
+def test_iter_decode_yields_items_before_reading_whole_stream(monkeypatch):
+    monkeypatch.setattr(binary, 'FRAME_SIZE', 8)
+
+    s_exp = [[Symbol('item'), i, [str(i)]] for i in range(100)]
+    stream = io.BytesIO(encode_to_bytes(s_exp))
+
+    items = iter_decode(stream)
+
+    assert next(items) == s_exp[0]
+    assert stream.tell() < len(stream.getvalue())
+    assert [s_exp[0]] + list(items) == s_exp
+
+
+@pytest.mark.parametrize(
+    'data,match_exc_msg',
+    (
+        (b'', 'not a binary s-expression'),
+        (b'LLLX\x01\x00', 'not a binary s-expression'),
+        (MAGIC + b'\x02\x00', 'unsupported binary s-expression version: 2'),
+        (MAGIC + b'\x01', 'truncated binary s-expression'),
+        (MAGIC + b'\x01\x07', 'invalid binary s-expression frame tag: 7'),
+    ),
+)
+def test_decode_rejects_invalid_data(data, match_exc_msg):
+    with pytest.raises(ValueError, match=match_exc_msg):
+        decode(io.BytesIO(data))
+
+
+def test_decode_rejects_truncated_data():
+    data = encode_to_bytes([[Symbol('foo'), [1, 2]]])
+
+    for size in range(len(data)):
+        with pytest.raises(ValueError):
+            decode(io.BytesIO(data[:size]))
+
+
+def test_encode_rejects_unsupported_items():
+    with pytest.raises(TypeError, match='unsupported s-expression item'):
+        encode([1.5], io.BytesIO())
+
+    with pytest.raises(ValueError, match='symbol cannot be encoded'):
+        encode([Symbol('')], io.BytesIO())
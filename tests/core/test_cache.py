@@ -0,0 +1,223 @@
+import os
+
+import pytest
+
+from lll import (
+    cache,
+)
+from lll.cache import (
+    CACHE_FILE_SUFFIX,
+    CachedParser,
+    ParseCache,
+    copy_s_exp,
+)
+from lll.exceptions import (
+    ParseError,
+)
+from lll.parser import (
+    parse_s_exp,
+)
+
+
+@pytest.fixture
+def parse_cache(tmp_path):
+    return ParseCache(tmp_path / 'cache')
+
+
+def get_cache_files(parse_cache):
+    return sorted(parse_cache.cache_dir.glob('*' + CACHE_FILE_SUFFIX))
+
+
+def test_cache_hit_equals_fresh_parse(parse_cache, parseable_lll_file):
+    with open(parseable_lll_file, 'r') as f:
+        source_code = f.read()
+
+    expected = parse_s_exp(source_code)
+
+    assert parse_cache.get(source_code) is None
+    assert parse_cache.parse(source_code) == expected
+    assert len(get_cache_files(parse_cache)) == 1
+
+    cached = parse_cache.get(source_code)
+
+    assert cached == expected
+    assert repr(cached) == repr(expected)
+
+
+def test_cache_is_shared_between_instances(tmp_path):
+    source_code = '(foo "bar" 1)\n'
+
+    ParseCache(tmp_path).parse(source_code)
+
+    assert ParseCache(tmp_path).get(source_code) == parse_s_exp(source_code)
+
+
+def test_cache_accepts_text_streams(parse_cache, open_fixture_file):
+    with open_fixture_file('ENS.lll.lisp', 'r') as f:
+        parse_cache.parse(f)
+
+    assert len(get_cache_files(parse_cache)) == 1
+
+
+def test_cache_key_depends_on_parser_version(parse_cache, monkeypatch):
+    source_code = '(foo "bar" 1)\n'
+    parse_cache.parse(source_code)
+
+    monkeypatch.setattr(cache, 'PARSER_VERSION', cache.PARSER_VERSION + 1)
+
+    assert parse_cache.get(source_code) is None
+
+
+def test_cache_does_not_store_parse_errors(parse_cache):
+    with pytest.raises(ParseError):
+        parse_cache.parse('(foo')
+
+    assert get_cache_files(parse_cache) == []
+
+
+def test_cache_discards_corrupted_entries(parse_cache):
+    source_code = '(foo "bar" 1)\n'
+    parse_cache.parse(source_code)
+
+    (path,) = get_cache_files(parse_cache)
+    path.write_bytes(b'garbage')
+
+    assert parse_cache.get(source_code) is None
+    assert get_cache_files(parse_cache) == []
+
+    assert parse_cache.parse(source_code) == parse_s_exp(source_code)
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    parse_cache = ParseCache(tmp_path)
+
+    sources = [f'(foo {i})\n' for i in range(3)]
+    for i, source_code in enumerate(sources):
+        parse_cache.parse(source_code)
+
+        # Give entries distinct modification times
+        path = parse_cache._get_path(parse_cache.get_key(source_code))
+        os.utime(path, (i, i))
+
+    # Using the oldest entry makes it the most recently used
+    assert parse_cache.get(sources[0]) is not None
+
+    parse_cache.max_size = parse_cache.get_size() - 1
+    parse_cache.evict()
+
+    assert parse_cache.get(sources[0]) is not None
+    assert parse_cache.get(sources[1]) is None
+    assert parse_cache.get(sources[2]) is not None
+
+
+def test_cache_scans_directory_only_when_it_may_be_full(tmp_path, monkeypatch):
+    parse_cache = ParseCache(tmp_path, max_size=2000)
+
+    num_scans = 0
+    get_entries = parse_cache._get_entries
+
+    def counting_get_entries():
+        nonlocal num_scans
+        num_scans += 1
+        return get_entries()
+
+    monkeypatch.setattr(parse_cache, '_get_entries', counting_get_entries)
+
+    for i in range(100):
+        parse_cache.parse(f'(foo {i})\n')
+
+    assert parse_cache.get_size() <= 2000
+    assert num_scans < 20
+
+
+def test_cache_clear(parse_cache):
+    parse_cache.parse('(foo)\n')
+    parse_cache.parse('(bar)\n')
+
+    parse_cache.clear()
+
+    assert get_cache_files(parse_cache) == []
+    assert parse_cache.get_size() == 0
+
+
+def test_copy_s_exp(get_parsed_fixture):
+    s_exp = get_parsed_fixture('ENS.lll.lisp')
+
+    copy = copy_s_exp(s_exp)
+
+    assert copy == s_exp
+    assert repr(copy) == repr(s_exp)
+    assert copy is not s_exp
+    assert copy[0] is not s_exp[0]
+    assert copy[0][0] is s_exp[0][0]
+
+
+def test_cached_parser_returns_copies():
+    parser = CachedParser()
+    source_code = '(seq (foo "bar" 1))\n'
+
+    first = parser.parse(source_code)
+    first[0][1].append('corrupted')
+    first.append('corrupted')
+
+    second = parser.parse(source_code)
+
+    assert second == parse_s_exp(source_code)
+    assert (parser.hits, parser.misses) == (1, 1)
+
+
+def test_cached_parser_accepts_text_streams(open_fixture_file, get_parsed_fixture):
+    parser = CachedParser()
+
+    for _ in range(2):
+        with open_fixture_file('ENS.lll.lisp', 'r') as f:
+            assert parser.parse(f) == get_parsed_fixture('ENS.lll.lisp')
+
+    assert (parser.hits, parser.misses) == (1, 1)
+
+
+def test_cached_parser_evicts_least_recently_used_entries():
+    parser = CachedParser(max_entries=2)
+
+    parser.parse('(foo)\n')
+    parser.parse('(bar)\n')
+    parser.parse('(foo)\n')
+    parser.parse('(baz)\n')
+
+    assert len(parser) == 2
+    assert (parser.hits, parser.misses, parser.evictions) == (1, 3, 1)
+
+    # The entry for (bar) was evicted
+    parser.parse('(foo)\n')
+    parser.parse('(bar)\n')
+
+    assert (parser.hits, parser.misses, parser.evictions) == (2, 4, 2)
+
+
+def test_cached_parser_max_bytes():
+    source_code = '(foo "bar" 1)\n'
+
+    parser = CachedParser(max_bytes=10)
+    assert parser.parse(source_code) == parse_s_exp(source_code)
+    assert len(parser) == 0
+    assert parser.nbytes == 0
+
+    parser = CachedParser(max_bytes=10000)
+    for i in range(100):
+        parser.parse(f'(foo {i})\n')
+
+    assert 0 < len(parser) < 100
+    assert 0 < parser.nbytes <= 10000
+    assert parser.evictions == 100 - len(parser)
+
+
+def test_cached_parser_clear():
+    parser = CachedParser()
+    parser.parse('(foo)\n')
+
+    parser.clear()
+
+    assert len(parser) == 0
+    assert parser.nbytes == 0
+    assert parser.parse('(foo)\n') == parse_s_exp('(foo)\n')
+    assert (parser.hits, parser.misses) == (0, 2)
@@ -0,0 +1,79 @@
+import pytest
+
+from lll.compact import (
+    INT,
+    LIST,
+    STR,
+    SYMBOL,
+    CompactTree,
+    get_s_exp_nbytes,
+)
+from lll.parser import (
+    Symbol,
+    parse_s_exp,
+)
+
+
+def test_compact_tree_round_trips_parseable_files(parseable_lll_file):
+    with open(parseable_lll_file, 'r') as f:
+        s_exp = parse_s_exp(f)
+
+    tree = CompactTree.from_s_exp(s_exp)
+
+    assert tree.to_s_exp() == s_exp
+    assert repr(tree.to_s_exp()) == repr(s_exp)
+
+
+def test_compact_tree_layout():
+    tree = CompactTree.from_s_exp(parse_s_exp('(foo "foo" (1 foo)) bar\n'))
+
+    assert len(tree) == 7
+    assert list(tree.kinds) == [LIST, SYMBOL, SYMBOL, STR, LIST, INT, SYMBOL]
+
+    assert tree.get_children() == range(0, 2)
+    assert tree.get_children(0) == range(2, 5)
+    assert tree.get_children(4) == range(5, 7)
+
+    assert tree.get_value(1) == 'bar'
+    assert tree.get_value(5) == 1
+
+    # Atoms are interned by kind
+    assert tree.symbols == ['bar', 'foo']
+    assert tree.strs == ['foo']
+    assert tree.indexes[2] == tree.indexes[6]
+
+    assert type(tree.get_value(2)) is Symbol
+    assert type(tree.get_value(3)) is str
+
+
+def test_compact_tree_rejects_invalid_nodes():
+    tree = CompactTree.from_s_exp(parse_s_exp('(foo) bar\n'))
+
+    with pytest.raises(ValueError, match='not a list'):
+        tree.get_children(1)
+    with pytest.raises(ValueError, match='not an atom'):
+        tree.get_value(0)
+
+
+def test_compact_tree_rejects_unsupported_items():
+    with pytest.raises(TypeError, match='unsupported s-expression item'):
+        CompactTree.from_s_exp([1.5])
+
+
+def test_compact_tree_handles_deep_nesting():
+    s_exp = [1]
+    for _ in range(100000):
+        s_exp = [s_exp]
+
+    tree = CompactTree.from_s_exp(s_exp)
+    result = tree.to_s_exp()
+
+    for _ in range(100000):
+        (result,) = result
+    assert result == [1]
+
+
+def test_compact_tree_uses_less_memory(get_parsed_fixture):
+    s_exp = get_parsed_fixture('ENS.lll.lisp')
+
+    assert CompactTree.from_s_exp(s_exp).nbytes < get_s_exp_nbytes(s_exp)
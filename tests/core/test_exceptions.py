@@ -1,3 +1,5 @@
+import pickle
+
 from lll.exceptions import (
     FormattedError,
 )
@@ -74,3 +76,91 @@ test.lll:3:26: test error
     (def 'test-const 0xxff)
                      ^^^^^
 """[1:-1]
+
+
+def test_formatted_error_first_line_offset():
+    assert str(FormattedError(
+        'test error',
+        SOURCE_CODE,
+        2, 25,
+        mark_size=5,
+        file_name=None,
+        first_line_offset=10,
+    )) == """
+line 13:26: test error
+    (def 'test-const 0xxff)
+                     ^^^^^
+"""[1:-1]
+
+    assert str(FormattedError(
+        'test error',
+        SOURCE_CODE,
+        -1, -1,
+        mark_size=1,
+        file_name='test.lll',
+        first_line_offset=10,
+    )) == """
+test.lll:15:1: test error
+)
+^
+"""[1:-1]
+
+
+def test_formatted_error_first_col_offset():
+    error = FormattedError.from_index(
+        'test error',
+        'test-const 0xxff)\n)',
+        len('test-const 0xxff') - 1,
+        mark_size=5,
+        first_line_offset=2,
+        first_col_offset=10,
+    )
+
+    assert error.col_offset == 25
+    assert str(error) == """
+line 3:26: test error
+...test-const 0xxff)
+              ^^^^^
+"""[1:-1]
+
+    assert str(pickle.loads(pickle.dumps(error))) == str(error)
+
+    # Only the first line of the source code is offset
+    assert str(FormattedError('test error', 'abc\n)', -1, -1, first_col_offset=10)) == (
+        'line 2:1: test error\n)\n^'
+    )
+
+
+def test_formatted_error_from_index():
+    error = FormattedError.from_index(
+        'test error',
+        SOURCE_CODE,
+        SOURCE_CODE.index('0xxff') + 4,
+        mark_size=5,
+    )
+
+    assert error.line_offset == 2
+    assert error.col_offset == 25
+    assert str(error) == """
+line 3:26: test error
+    (def 'test-const 0xxff)
+                     ^^^^^
+"""[1:-1]
+
+
+def test_formatted_error_from_index_at_eof():
+    error = FormattedError.from_index('test error', '(a)\n', 4)
+
+    assert str(error) == 'line 2:1: test error\n\n^'
+
+
+def test_formatted_error_strips_carriage_returns():
+    source_code = SOURCE_CODE.replace('\n', '\r\n')
+
+    assert str(FormattedError('test error', source_code, 2, 25, mark_size=5)) == """
+line 3:26: test error
+    (def 'test-const 0xxff)
+                     ^^^^^
+"""[1:-1]
+
+    assert str(FormattedError('test error', source_code, -1, -1)) == 'line 5:1: test error\n)\n^'
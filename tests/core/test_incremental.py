@@ -0,0 +1,143 @@
+import random
+
+import pytest
+
+from lll.exceptions import (
+    ParseError,
+)
+from lll.incremental import (
+    parse_with_state,
+    reparse,
+)
+from lll.parser import (
+    parse_s_exp,
+)
+
+
+SOURCE_CODE = '(a "b c" 1)\n; x\n(d (e 0x1f) f) g\n"h"'
+
+
+def assert_state_matches_full_parse(state):
+    expected = parse_with_state(state.source_code)
+
+    assert state.s_exp == expected.s_exp
+
+    stack = [(state.s_exp, expected.s_exp)]
+    while stack:
+        item, expected_item = stack.pop()
+        assert state.spans[id(item)] == expected.spans[id(expected_item)]
+
+        stack.extend(
+            (child, expected_child)
+            for child, expected_child in zip(item, expected_item)
+            if isinstance(child, list)
+        )
+
+
+@pytest.mark.parametrize(
+    'start,end,text,expected',
+    (
+        (1, 2, 'abc', [['abc', 'b c', 1], ['d', ['e', 31], 'f'], 'g', 'h']),
+        (26, 26, ' 2', [['a', 'b c', 1], ['d', ['e', 31, 2], 'f'], 'g', 'h']),
+        (19, 28, '', [['a', 'b c', 1], ['d', 'f'], 'g', 'h']),
+        (31, 32, '(g)', [['a', 'b c', 1], ['d', ['e', 31], 'f'], ['g'], 'h']),
+        (33, 36, '(i)', [['a', 'b c', 1], ['d', ['e', 31], 'f'], 'g', ['i']]),
+        (15, 16, '', [['a', 'b c', 1], 'h']),
+    ),
+)
+def test_reparse(start, end, text, expected):
+    state = reparse(parse_with_state(SOURCE_CODE), start, end, text)
+
+    assert state.s_exp == expected
+    assert_state_matches_full_parse(state)
+
+
+def test_reparse_shares_unchanged_items():
+    state = parse_with_state(SOURCE_CODE)
+
+    # Replace the 1 in the first list
+    new_state = reparse(state, 9, 10, '2')
+
+    assert new_state.s_exp[0] == ['a', 'b c', 2]
+    assert new_state.s_exp[1] is state.s_exp[1]
+
+    # The previous state is unchanged
+    assert state.s_exp[0] == ['a', 'b c', 1]
+    assert state.source_code == SOURCE_CODE
+    assert_state_matches_full_parse(state)
+
+
+@pytest.mark.parametrize(
+    'start,end,text',
+    (
+        # Opens a string literal which closes in a later form
+        (3, 3, '"'),
+        # Opens a comment which hides the rest of a line
+        (12, 12, ';'),
+        # Joins a comment with the next line
+        (15, 16, ''),
+        # Removes the closing paren of a list
+        (9, 10, ''),
+    ),
+)
+def test_reparse_falls_back_to_full_parse(start, end, text):
+    source_code = '(a (b "c") d)\n(e ; f\n g)\n'
+    state = parse_with_state(source_code)
+
+    new_source_code = source_code[:start] + text + source_code[end:]
+
+    try:
+        expected = parse_s_exp(new_source_code)
+    except ParseError as e:
+        with pytest.raises(ParseError) as excinfo:
+            reparse(state, start, end, text)
+        assert str(excinfo.value) == str(e)
+    else:
+        new_state = reparse(state, start, end, text)
+        assert new_state.s_exp == expected
+        assert_state_matches_full_parse(new_state)
+
+
+def test_reparse_reports_errors_in_whole_source_code(get_fixture_contents):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+    state = parse_with_state(source_code)
+
+    index = source_code.index('0x04)') + 2
+    new_source_code = source_code[:index] + 'g' + source_code[index:]
+
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(new_source_code)
+
+    with pytest.raises(ParseError) as excinfo:
+        reparse(state, index, index, 'g')
+
+    assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+def test_random_edits_match_full_parse(get_fixture_contents):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+    state = parse_with_state(source_code)
+    rand = random.Random(0)
+
+    for _ in range(200):
+        start = rand.randrange(len(state.source_code))
+        end = min(start + rand.choice((0, 1, 5)), len(state.source_code))
+        text = ''.join(rand.choice('() ;"\nx1') for _ in range(rand.choice((0, 1, 2))))
+
+        try:
+            new_state = reparse(state, start, end, text)
+        except ParseError:
+            continue
+
+        assert_state_matches_full_parse(new_state)
+        state = new_state
+
+
+def test_reparse_rejects_invalid_ranges():
+    state = parse_with_state(SOURCE_CODE)
+
+    with pytest.raises(ValueError, match='invalid edit range'):
+        reparse(state, 5, 4, '')
+
+    with pytest.raises(ValueError, match='invalid edit range'):
+        reparse(state, 0, len(SOURCE_CODE) + 1, '')
@@ -1,14 +1,36 @@
+import array
+import gc
+import io
+import os
 import pprint
+import threading
+import tracemalloc
 
 import pytest
 
+from lll import (
+    parser,
+)
 from lll.exceptions import (
     ParseError,
+    ParseLimitError,
 )
 from lll.parser import (
     ParseBuffer,
+    ParseLimits,
+    ParseStats,
+    SourceLocations,
+    Symbol,
+    SymbolTable,
     _parse_symbol_or_int,
+    iter_parse,
+    iter_s_exps,
+    parse_file,
     parse_s_exp,
+    parse_s_exp_with_errors,
+    parse_s_exp_with_locations,
+    select_s_exps,
+    validate,
 )
 
 
@@ -28,10 +50,11 @@ def test_parse_buffer_yields_source_code_characters(get_fixture_contents):
     assert ''.join(res) == source_code
 
 
-def test_parse_buffer_tracks_offsets(get_fixture_contents):
+@pytest.mark.parametrize('lazy_positions', (False, True))
+def test_parse_buffer_tracks_offsets(get_fixture_contents, lazy_positions):
     source_code = get_fixture_contents('string_literals.lll.lisp')
 
-    buf = ParseBuffer(source_code)
+    buf = ParseBuffer(source_code, lazy_positions=lazy_positions)
     buf_it = iter(buf)
 
     res = []
@@ -61,6 +84,7 @@ def test_parse_buffer_tracks_offsets(get_fixture_contents):
             break
 
     assert ''.join(res) == source_code
+    assert buf.index == len(source_code)
     assert buf.line_offset == 9
     assert buf.col_offset == 0
 
@@ -137,6 +161,24 @@ def test_parse_symbol_or_int_raises_errors(input, match_exc_msg):
         assert _parse_symbol_or_int(buf, input) == match_exc_msg
 
 
+def test_int_literal_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(parser, 'INT_LITERAL_CACHE_SIZE', 2)
+    monkeypatch.setattr(parser, '_int_literal_cache', {})
+
+    assert parse_s_exp('(0x20 0x00 0x20 foo 0x40 0x20)') == [[32, 0, 32, 'foo', 64, 32]]
+    assert len(parser._int_literal_cache) <= 2
+
+    assert parse_s_exp('(0x20 0x40)') == [[32, 64]]
+    assert isinstance(parse_s_exp('0x20 ')[0], int)
+
+
+def test_int_literal_cache_keeps_error_messages():
+    assert parse_s_exp('0x20 ') == [32]
+
+    with pytest.raises(ParseError, match="base 16: '0x20g'"):
+        parse_s_exp('0x20g ')
+
+
 def test_parseable_files_are_parseable(parseable_lll_file):
     with open(parseable_lll_file, 'r') as f:
         parse_s_exp(f)
@@ -166,3 +208,896 @@ def test_parsing_ENS(get_parsed_fixture, get_fixture_contents):
     parsed_repr = get_fixture_contents('ENS.lll.lisp.repr')
 
     assert get_sexp_repr(parsed) == parsed_repr
+
+
+@pytest.mark.parametrize('lazy_positions', (False, True))
+def test_parse_buffer_seek(lazy_positions):
+    buf = ParseBuffer('(foo\n  bar)\n', lazy_positions=lazy_positions)
+
+    buf.seek(0)
+    assert (buf.line_offset, buf.col_offset) == (0, 0)
+
+    buf.seek(4)
+    assert (buf.line_offset, buf.col_offset) == (0, 4)
+
+    buf.seek(5)
+    assert (buf.line_offset, buf.col_offset) == (1, 0)
+
+    buf.seek(10)
+    assert (buf.line_offset, buf.col_offset) == (1, 5)
+
+    buf.seek(11)
+    assert (buf.line_offset, buf.col_offset) == (1, 6)
+
+    buf.seek(12)
+    assert (buf.line_offset, buf.col_offset) == (2, 0)
+
+
+def test_parse_buffer_lazy_positions_match_eager_positions(get_fixture_contents):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+
+    eager_buf = ParseBuffer(source_code)
+    lazy_buf = ParseBuffer(source_code, lazy_positions=True)
+
+    for _ in zip(eager_buf, lazy_buf):
+        assert eager_buf.index == lazy_buf.index
+        assert eager_buf.line_offset == lazy_buf.line_offset
+        assert eager_buf.col_offset == lazy_buf.col_offset
+
+
+@pytest.mark.parametrize(
+    'input,expected',
+    (
+        ('', []),
+        ('  \n', []),
+        ('; comment only', []),
+        ('foo ', [Symbol('foo')]),
+        ('(foo)(bar)', [[Symbol('foo')], [Symbol('bar')]]),
+        ('(foo;comment\nbar)', [[Symbol('foo'), Symbol('bar')]]),
+        ('(foo "bar;baz" 1)', [[Symbol('foo'), 'bar;baz', 1]]),
+        ('(foo "" -0x1)', [[Symbol('foo'), '', -1]]),
+        ('("\\q")', [['\\q']]),
+    ),
+)
+def test_parse_s_exp(input, expected):
+    parsed = parse_s_exp(input)
+
+    assert parsed == expected
+    assert repr(parsed) == repr(expected)
+
+
+@pytest.mark.parametrize(
+    'input,expected_msg',
+    (
+        (
+            '(seq\n  (def foo 0xxff))',
+            "line 2:16: invalid literal for int with base 16: '0xxff'\n"
+            "  (def foo 0xxff))\n"
+            "           ^^^^^",
+        ),
+        (
+            '(foo 1 2)\n(bar 0b12\n)',
+            "line 2:9: invalid literal for int with base 2: '0b12'\n"
+            "(bar 0b12\n"
+            "     ^^^^",
+        ),
+        (
+            '(foo 0xxff',
+            "line 1:10: reached EOF before termination of s-expression\n"
+            "(foo 0xxff\n"
+            "         ^",
+        ),
+        (
+            '(foo) bar',
+            "line 1:9: reached EOF before termination of s-expression\n"
+            "(foo) bar\n"
+            "        ^",
+        ),
+        (
+            '(foo "bar)\n',
+            "line 1:10: reached EOF before termination of string literal\n"
+            '(foo "bar)\n'
+            "         ^",
+        ),
+        (
+            '(foo)\n  bar)\n',
+            "line 2:6: unexpected closing paren\n"
+            "  bar)\n"
+            "     ^",
+        ),
+    ),
+)
+def test_parse_s_exp_error_messages(input, expected_msg):
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp(input)
+
+    assert str(excinfo.value) == expected_msg
+
+
+def test_parse_s_exp_accepts_text_streams(get_fixture_contents):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+
+    assert parse_s_exp(io.StringIO(source_code)) == parse_s_exp(source_code)
+
+
+def test_parse_buffer_rejects_unsupported_input_types():
+    with pytest.raises(ValueError, match='unsupported input type'):
+        ParseBuffer(io.BytesIO(b'(foo)'))
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 7, 64, 4096))
+def test_iter_parse_matches_parse_s_exp(parseable_lll_file, chunk_size):
+    with open(parseable_lll_file, 'r') as f:
+        expected = parse_s_exp(f)
+
+    with open(parseable_lll_file, 'r') as f:
+        parsed = list(iter_parse(f, chunk_size=chunk_size))
+
+    assert parsed == expected
+    assert get_sexp_repr(parsed) == get_sexp_repr(expected)
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 7, 64, 4096))
+def test_iter_parse_error_messages_match_parse_s_exp(unparseable_lll_file, chunk_size):
+    with open(unparseable_lll_file, 'r') as f:
+        with pytest.raises(ParseError) as expected_excinfo:
+            parse_s_exp(f)
+
+    with open(unparseable_lll_file, 'r') as f:
+        with pytest.raises(ParseError) as excinfo:
+            list(iter_parse(f, chunk_size=chunk_size))
+
+    assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+def test_iter_parse_yields_forms_as_they_are_completed():
+    stream = io.StringIO('(foo "bar\n baz")\n' + '(bar 1)\n' * 10 + '(baz 2')
+
+    forms = iter_parse(stream, chunk_size=4)
+
+    assert next(forms) == [Symbol('foo'), 'bar\n baz']
+    assert stream.tell() < len(stream.getvalue())
+
+    for _ in range(10):
+        assert next(forms) == [Symbol('bar'), 1]
+
+    with pytest.raises(ParseError, match='line 13:6: reached EOF'):
+        next(forms)
+
+
+def test_iter_parse_yields_forms_from_long_lines():
+    stream = io.StringIO('(foo 1) ; (bar)\n' + '(bar "1 2" 3) ; x\t' * 1000)
+
+    forms = iter_parse(stream, chunk_size=16)
+
+    assert next(forms) == [Symbol('foo'), 1]
+    assert next(forms) == [Symbol('bar'), '1 2', 3]
+    assert stream.tell() < 100
+
+
+@pytest.mark.parametrize(
+    'input,chunk_size',
+    (
+        ('(foo)\n' * 10 + '(bar 0xzz)', 3),
+        ('(foo\n "bar\n\n baz" 0xzz)', 5),
+        ('; comment 0xzz\n(foo 0xzz)', 4),
+        ('(foo) ' * 100 + '(bar 0xzz) ' + '(foo) ' * 100 + '\n(baz)', 7),
+        ('(foo) ' * 100 + '(bar 0xzz) ' + '(foo) ' * 100, 7),
+        ('(foo) ' * 100 + '(bar ; 0xzz\n 0xzz) (foo)', 7),
+        ('(foo) ' * 100 + '(bar', 7),
+    ),
+)
+def test_iter_parse_error_messages_across_chunks(input, chunk_size):
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(input)
+
+    with pytest.raises(ParseError) as excinfo:
+        list(iter_parse(io.StringIO(input), chunk_size=chunk_size))
+
+    assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 4096))
+def test_iter_parse_error_messages_show_part_of_long_lines(chunk_size):
+    input = '(foo) ' * 5000 + '(bar 0xzz) ' + '(foo) ' * 5000 + '\n(baz)'
+
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(input)
+
+    with pytest.raises(ParseError) as excinfo:
+        list(iter_parse(io.StringIO(input), chunk_size=chunk_size))
+
+    header, line, mark = str(excinfo.value).split('\n')
+
+    assert header == str(expected_excinfo.value).split('\n')[0]
+    assert line.startswith('...') and len(line) < len(input) // 2
+    assert line[mark.index('^'):len(mark)] == '0xzz'
+
+
+def test_iter_parse_memory_is_bounded_on_long_lines():
+    stream = io.StringIO('(a b c) ' * 100000)
+
+    tracemalloc.start()
+    try:
+        for _ in iter_parse(stream, chunk_size=4096):
+            pass
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Far less than the 800KB line
+    assert peak_memory < 200 * 1024
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 4096))
+def test_iter_s_exps_matches_parse_s_exp(parseable_lll_file, chunk_size):
+    with open(parseable_lll_file, 'r') as f:
+        source_code = f.read()
+
+    expected = parse_s_exp(source_code)
+
+    assert list(iter_s_exps(source_code, chunk_size=chunk_size)) == expected
+    assert list(iter_s_exps(io.StringIO(source_code), chunk_size=chunk_size)) == expected
+
+
+def test_iter_s_exps_yields_forms_before_errors():
+    forms = iter_s_exps('(foo 1)\n' * 100 + '(bar 0xzz)', chunk_size=16)
+
+    assert next(forms) == [Symbol('foo'), 1]
+
+    with pytest.raises(ParseError, match="line 101:9: invalid literal"):
+        list(forms)
+
+
+def test_iter_s_exps_parses_one_chunk_of_a_single_line_before_yielding():
+    source_code = '(foo 1) ' * 10000
+    stats = ParseStats()
+
+    forms = iter_s_exps(source_code, chunk_size=64, stats=stats)
+
+    assert next(forms) == [Symbol('foo'), 1]
+    assert stats.num_chars == 64
+
+
+def test_iter_s_exps_rejects_unsupported_input_types():
+    with pytest.raises(ValueError, match='unsupported input type'):
+        iter_s_exps(io.BytesIO(b'(foo)'))
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 4096))
+def test_parse_file_matches_parse_s_exp(parseable_lll_file, chunk_size):
+    with open(parseable_lll_file, 'r') as f:
+        expected = parse_s_exp(f)
+
+    parsed = parse_file(parseable_lll_file, chunk_size=chunk_size)
+
+    assert parsed == expected
+    assert get_sexp_repr(parsed) == get_sexp_repr(expected)
+
+
+@pytest.mark.parametrize('chunk_size', (1, 7, 4096))
+def test_parse_file_error_messages_include_file_name(unparseable_lll_file, chunk_size):
+    with open(unparseable_lll_file, 'r') as f:
+        with pytest.raises(ParseError) as expected_excinfo:
+            parse_s_exp(f)
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_file(unparseable_lll_file, chunk_size=chunk_size)
+
+    expected_msg = str(expected_excinfo.value).replace('line ', str(unparseable_lll_file) + ':', 1)
+
+    assert excinfo.value.file_name == str(unparseable_lll_file)
+    assert str(excinfo.value) == expected_msg
+
+
+@pytest.mark.parametrize('chunk_size', (1, 2, 3, 4096))
+def test_parse_file_decodes_multi_byte_characters(tmp_path, chunk_size):
+    path = tmp_path / 'test.lll'
+    path.write_text('(seq "héllo ✓" ✓sym)\n(foo 1)\n', encoding='utf-8')
+
+    assert parse_file(path, chunk_size=chunk_size) == [
+        ['seq', 'héllo ✓', '✓sym'],
+        ['foo', 1],
+    ]
+
+
+def test_parse_file_accepts_empty_files(tmp_path):
+    path = tmp_path / 'test.lll'
+    path.write_bytes(b'')
+
+    assert parse_file(path) == []
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='requires named pipes')
+@pytest.mark.parametrize(
+    'data,expected',
+    (
+        (b'(foo "\xc3\xa9")\n(bar 1)', [['foo', '\xe9'], ['bar', 1]]),
+        (b'(foo)\n(bar \xff baz)\n', ':2:6: invalid utf-8 in source code'),
+    ),
+)
+@pytest.mark.parametrize('chunk_size', (1, 4096))
+def test_parse_file_reads_files_without_size(tmp_path, data, expected, chunk_size):
+    path = tmp_path / 'test.lll'
+    os.mkfifo(str(path))
+
+    def write():
+        with open(path, 'wb') as f:
+            f.write(data)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+
+    try:
+        if isinstance(expected, str):
+            with pytest.raises(ParseError) as excinfo:
+                parse_file(path, chunk_size=chunk_size)
+            assert str(excinfo.value).startswith(f'{path}{expected}')
+        else:
+            assert parse_file(path, chunk_size=chunk_size) == expected
+    finally:
+        writer.join()
+
+
+@pytest.mark.parametrize('chunk_size', (1, 4096))
+def test_parse_file_reports_invalid_utf8(tmp_path, chunk_size):
+    path = tmp_path / 'test.lll'
+    path.write_bytes('(foo)\n(bar "é\xff" baz)\n'.encode('utf-8').replace(b'\xc3\xbf', b'\xff'))
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_file(path, chunk_size=chunk_size)
+
+    assert excinfo.value.file_name == str(path)
+    assert str(excinfo.value).startswith(str(path) + ':2:8: invalid utf-8 in source code')
+
+
+def test_parse_s_exp_with_locations_records_spans():
+    source_code = '(foo "bar" ; (baz\n  (1 foo)) qux\n'
+    s_exp, locations = parse_s_exp_with_locations(source_code)
+
+    assert s_exp == [['foo', 'bar', [1, 'foo']], 'qux']
+    assert isinstance(locations, SourceLocations)
+    assert len(locations) == 7
+
+    spans = [locations.get_span(node) for node in range(len(locations))]
+    assert [source_code[start:end] for start, end in spans] == [
+        '(foo "bar" ; (baz\n  (1 foo))',
+        'foo',
+        '"bar"',
+        '(1 foo)',
+        '1',
+        'foo',
+        'qux',
+    ]
+
+    assert locations.get_children() == [0, 6]
+    assert locations.get_children(0) == [1, 2, 3]
+    assert locations.get_children(3) == [4, 5]
+    assert locations.get_children(4) == []
+
+    assert locations.get_node(s_exp[0][2]) == 3
+    assert locations.locate(s_exp[0]) == spans[0]
+    assert locations.locate(s_exp[0][2], 1) == spans[5]
+
+    assert locations.get_position(spans[3][0]) == (1, 2)
+
+    with pytest.raises(ValueError, match='not a node'):
+        locations.get_node(['foo'])
+
+
+def test_parse_s_exp_with_locations_matches_parse_s_exp(get_fixture_contents):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+    s_exp, locations = parse_s_exp_with_locations(source_code)
+
+    assert s_exp == parse_s_exp(source_code)
+
+    # Each list reparses from its own span
+    stack = list(s_exp)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, list):
+            start, end = locations.locate(item)
+            assert parse_s_exp(source_code[start:end]) == [item]
+            stack.extend(item)
+
+
+@pytest.mark.parametrize(
+    'input',
+    (
+        '(foo',
+        '(foo "bar',
+        '(foo 0xg)',
+        '(foo))',
+    ),
+)
+def test_parse_s_exp_with_locations_error_messages(input):
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(input)
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp_with_locations(input)
+
+    assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+def test_parse_s_exp_shares_symbols_within_a_parse():
+    parsed = parse_s_exp('(seq (foo 1) (foo 2))\n')
+
+    assert parsed[0][1][0] is parsed[0][2][0]
+
+
+@pytest.mark.parametrize(
+    'symbol_table',
+    (SymbolTable(), SymbolTable(max_size=10), SymbolTable(weak=True)),
+)
+def test_symbol_table_shares_symbols_between_parses(symbol_table):
+    parsed_1 = parse_s_exp('(seq (foo 1))\n', symbol_table=symbol_table)
+    parsed_2 = list(iter_parse(io.StringIO('(seq (foo 2))\n'), symbol_table=symbol_table))
+    parsed_3 = list(iter_s_exps('(seq (foo 3))\n', symbol_table=symbol_table))
+
+    assert parsed_1[0][0] is parsed_2[0][0] is parsed_3[0][0]
+    assert parsed_1[0][1][0] is parsed_2[0][1][0] is parsed_3[0][1][0]
+    assert type(parsed_1[0][0]) is Symbol
+
+    assert 'seq' in symbol_table
+    assert 'foo' in symbol_table
+    assert len(symbol_table) == 2
+
+
+def test_symbol_table_max_size_evicts_least_recently_used():
+    symbol_table = SymbolTable(max_size=2)
+
+    foo = symbol_table.intern('foo')
+    symbol_table.intern('bar')
+    assert symbol_table.intern('foo') is foo
+
+    symbol_table.intern('baz')
+
+    assert len(symbol_table) == 2
+    assert 'foo' in symbol_table
+    assert 'bar' not in symbol_table
+    assert 'baz' in symbol_table
+
+
+def test_weak_symbol_table_evicts_unused_symbols():
+    symbol_table = SymbolTable(weak=True)
+
+    parsed = parse_s_exp('(foo bar)\n', symbol_table=symbol_table)
+    assert len(symbol_table) == 2
+
+    del parsed
+    gc.collect()
+
+    assert len(symbol_table) == 0
+
+
+@pytest.mark.parametrize(
+    'kwargs,match_exc_msg',
+    (
+        ({'max_size': 10, 'weak': True}, 'not supported for weak'),
+        ({'max_size': 0}, 'must be positive'),
+    ),
+)
+def test_symbol_table_rejects_invalid_arguments(kwargs, match_exc_msg):
+    with pytest.raises(ValueError, match=match_exc_msg):
+        SymbolTable(**kwargs)
+
+
+LIMITS_SOURCE_CODE = '(a (b (c "long string")) 0x1234)\n(d)\n'
+
+
+@pytest.mark.parametrize(
+    'limits,expected_exc_msg',
+    (
+        (
+            ParseLimits(max_depth=2),
+            'line 1:7: exceeded maximum nesting depth (2)\n'
+            '(a (b (c "long string")) 0x1234)\n'
+            '      ^',
+        ),
+        (
+            ParseLimits(max_token_length=5),
+            'line 1:10: exceeded maximum token length (5)\n'
+            '(a (b (c "long string")) 0x1234)\n'
+            '         ^',
+        ),
+        (
+            ParseLimits(max_nodes=5),
+            'line 1:8: exceeded maximum number of nodes (5)\n'
+            '(a (b (c "long string")) 0x1234)\n'
+            '       ^',
+        ),
+        (
+            ParseLimits(max_input_size=34),
+            'line 2:2: exceeded maximum input size (34)\n'
+            '(d\n'
+            ' ^',
+        ),
+    ),
+)
+def test_parse_limits(limits, expected_exc_msg):
+    with pytest.raises(ParseLimitError) as excinfo:
+        parse_s_exp(LIMITS_SOURCE_CODE, limits=limits)
+
+    assert str(excinfo.value) == expected_exc_msg
+
+    for chunk_size in (1, 7, 1024):
+        with pytest.raises(ParseLimitError) as excinfo:
+            list(iter_parse(io.StringIO(LIMITS_SOURCE_CODE), chunk_size, limits=limits))
+
+        assert str(excinfo.value) == expected_exc_msg
+
+
+def test_parse_within_limits():
+    limits = ParseLimits(
+        max_depth=3,
+        max_token_length=13,
+        max_nodes=10,
+        max_input_size=len(LIMITS_SOURCE_CODE),
+    )
+
+    assert parse_s_exp(LIMITS_SOURCE_CODE, limits=limits) == parse_s_exp(LIMITS_SOURCE_CODE)
+
+
+def test_parse_limit_error_is_parse_error():
+    with pytest.raises(ParseError):
+        parse_s_exp('((a))', limits=ParseLimits(max_depth=1))
+
+
+def test_max_input_size_bounds_reads():
+    sizes = []
+
+    class Stream(io.StringIO):
+        def read(self, size=-1):
+            sizes.append(size)
+            return super().read(size)
+
+    with pytest.raises(ParseLimitError):
+        list(iter_parse(Stream('(a)\n' * 100000), limits=ParseLimits(max_input_size=100)))
+
+    assert sum(sizes) <= 101
+
+
+@pytest.mark.parametrize(
+    'source_code,expected_col_offset',
+    (
+        ('(a "' + 'x' * 1000000, 3),
+        ('(a ' + 'x' * 1000000, 3),
+    ),
+    ids=('string', 'symbol'),
+)
+def test_max_token_length_bounds_reads_of_incomplete_tokens(source_code, expected_col_offset):
+    sizes = []
+
+    class Stream(io.StringIO):
+        def read(self, size=-1):
+            sizes.append(size)
+            return super().read(size)
+
+    with pytest.raises(ParseLimitError) as excinfo:
+        list(iter_parse(Stream(source_code), 1024, limits=ParseLimits(max_token_length=100)))
+
+    assert str(excinfo.value).startswith(
+        f'line 1:{expected_col_offset + 1}: exceeded maximum token length (100)\n',
+    )
+    assert excinfo.value.col_offset == expected_col_offset
+    assert sum(sizes) < 10000
+
+
+def test_max_token_length_does_not_limit_incomplete_comments():
+    source_code = '(a ;' + 'x' * 10000 + '\n)'
+    limits = ParseLimits(max_token_length=5)
+
+    assert list(iter_parse(io.StringIO(source_code), 16, limits=limits)) == parse_s_exp('(a)')
+
+
+def test_parse_file_limits(tmp_path):
+    path = tmp_path / 'deep.lll'
+    path.write_text('(' * 1000 + ')' * 1000)
+
+    with pytest.raises(ParseLimitError) as excinfo:
+        parse_file(path, limits=ParseLimits(max_depth=100))
+
+    assert str(excinfo.value).startswith(f'{path}:1:101: exceeded maximum nesting depth (100)')
+
+
+STATS_SOURCE_CODE = '(a (b 1 "x") ; c\n 0x2 a)\n(d (e (f)))'
+
+
+@pytest.mark.parametrize('chunk_size', (1, 5, 1024))
+def test_parse_stats(chunk_size):
+    stats = ParseStats()
+
+    s_exp = list(iter_s_exps(STATS_SOURCE_CODE, chunk_size, stats=stats))
+
+    assert s_exp == parse_s_exp(STATS_SOURCE_CODE)
+    assert stats.num_chars == len(STATS_SOURCE_CODE)
+    assert stats.num_bytes == len(STATS_SOURCE_CODE)
+    assert stats.num_lists == 5
+    assert stats.num_symbols == 6
+    assert stats.num_ints == 2
+    assert stats.num_strs == 1
+    assert stats.num_comments == 1
+    assert stats.max_depth == 3
+    assert stats.num_decoded_words == 7
+    assert stats.num_allocations == 13
+    assert stats.tokenize_time >= 0
+    assert stats.build_time > 0
+
+
+def test_parse_stats_accumulate():
+    stats = ParseStats()
+
+    parse_s_exp('(a b)', stats=stats)
+    parse_s_exp('(((c)))', stats=stats)
+
+    assert stats.num_lists == 4
+    assert stats.num_symbols == 3
+    assert stats.max_depth == 3
+    assert repr(stats).startswith('ParseStats(num_chars=12, num_bytes=12, num_lists=4, ')
+
+
+@pytest.mark.parametrize('chunk_size', (1, 3, 1024))
+def test_parse_stats_count_bytes(chunk_size):
+    source_code = '(\u00e9 "\u20ac" \U0001f600)'
+    stats = ParseStats()
+
+    list(iter_s_exps(source_code.encode('utf-8'), chunk_size, stats=stats))
+
+    assert stats.num_chars == len(source_code)
+    assert stats.num_bytes == len(source_code.encode('utf-8'))
+
+
+def test_parse_s_exp_with_errors_reports_all_errors():
+    s_exp, errors = parse_s_exp_with_errors(
+        '(a 1)\n'
+        '(b 0xg)\n'
+        ') (c)\n'
+        '(d (e 0b2) f)\n'
+        '(g "h")\n'
+        '(i\n'
+    )
+
+    assert s_exp == [['a', 1], ['c'], ['g', 'h']]
+    assert [str(e).split('\n')[0] for e in errors] == [
+        "line 2:6: invalid literal for int with base 16: '0xg'",
+        'line 3:1: unexpected closing paren',
+        "line 4:9: invalid literal for int with base 2: '0b2'",
+        'line 6:2: reached EOF before termination of s-expression',
+    ]
+
+
+@pytest.mark.parametrize(
+    'input,expected_s_exp',
+    (
+        ('(a) b', [['a']]),
+        ('(a 0xg', []),
+    ),
+)
+def test_parse_s_exp_with_errors_at_eof(input, expected_s_exp):
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp(input)
+
+    s_exp, errors = parse_s_exp_with_errors(input)
+
+    assert s_exp == expected_s_exp
+    assert str(errors[0]) == str(excinfo.value)
+
+
+@pytest.mark.parametrize(
+    'input,expected_s_exp,expected_position',
+    (
+        ('(a)\n(b "c)\n', [['a']], (2, 4)),
+        ('"abc (def)\n(ghi)', [], (1, 1)),
+        ('(a "x\n(b)\n(c)', [], (1, 4)),
+        ('(a) "b\n(c) (d e)', [['a']], (1, 5)),
+    ),
+)
+def test_parse_s_exp_with_errors_stops_at_unterminated_string(input,
+                                                              expected_s_exp,
+                                                              expected_position):
+    s_exp, errors = parse_s_exp_with_errors(input)
+
+    assert s_exp == expected_s_exp
+    assert len(errors) == 1
+    assert errors[0].msg == 'reached EOF before termination of string literal'
+    assert (errors[0].line_offset + 1, errors[0].col_offset + 1) == expected_position
+
+
+def test_parse_s_exp_with_errors_matches_parse_s_exp(parseable_lll_file):
+    with open(parseable_lll_file, 'r') as f:
+        source_code = f.read()
+
+    assert parse_s_exp_with_errors(source_code) == (parse_s_exp(source_code), [])
+
+
+def test_parse_s_exp_with_errors_reports_first_error_as_parse_s_exp(unparseable_lll_file):
+    with open(unparseable_lll_file, 'r') as f:
+        source_code = f.read()
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp(source_code)
+
+    _, errors = parse_s_exp_with_errors(source_code)
+
+    # Unterminated string literals are reported where they begin rather than
+    # at EOF
+    assert errors[0].msg == excinfo.value.msg
+
+
+@pytest.mark.parametrize(
+    'input',
+    (
+        '',
+        '(a "b (" ; c)\n 0x1f -12 0o17 0b101 1_000)',
+        '(a\r\n 0x1f\r\n)\r\n',
+        '(a ; b)\n)',
+        '(1١ -a a-1)',
+        '(' * 100 + ')' * 100,
+        '(a',
+        '(a) b',
+        '(a "b)',
+        '(a ; b)',
+        '(0xg)',
+        '(0X1f)',
+        '(1-)',
+        '"(" )',
+        '(a))',
+        '(' * 100 + ')' * 101,
+    ),
+)
+def test_validate_matches_parse_s_exp(input):
+    try:
+        parse_s_exp(input)
+    except ParseError as e:
+        assert str(validate(input)) == str(e)
+    else:
+        assert validate(input) is None
+
+
+def test_validate_files(parseable_lll_file, unparseable_lll_file):
+    with open(parseable_lll_file, 'r') as f:
+        assert validate(f) is None
+
+    with open(unparseable_lll_file, 'r') as f:
+        source_code = f.read()
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp(source_code)
+
+    assert str(validate(io.StringIO(source_code))) == str(excinfo.value)
+
+
+@pytest.mark.parametrize('to_bytes_like', (bytes, bytearray, memoryview))
+def test_parse_bytes_like_objects(get_fixture_contents, to_bytes_like):
+    source_code = get_fixture_contents('ENS.lll.lisp')
+    expected = parse_s_exp(source_code)
+
+    data = to_bytes_like(source_code.encode('utf-8'))
+
+    assert parse_s_exp(data) == expected
+    assert list(iter_s_exps(data, chunk_size=7)) == expected
+    assert parse_s_exp_with_locations(data)[0] == expected
+    assert validate(data) is None
+
+
+def test_parse_memoryview_of_other_formats():
+    data = memoryview(array.array('B', '(foo "é")\n'.encode('utf-8')))
+
+    assert parse_s_exp(data) == [['foo', 'é']]
+
+
+@pytest.mark.parametrize('to_bytes_like', (bytes, bytearray, memoryview))
+def test_parse_bytes_like_objects_reports_invalid_utf8(to_bytes_like):
+    data = to_bytes_like(b'(foo)\n(bar \xff baz)\n')
+    expected_msg = (
+        'line 2:6: invalid utf-8 in source code: invalid start byte\n'
+        '(bar \ufffd baz)\n'
+        '     ^'
+    )
+
+    for parse in (parse_s_exp, parse_s_exp_with_locations, validate):
+        with pytest.raises(ParseError) as excinfo:
+            parse(data)
+        assert str(excinfo.value) == expected_msg
+
+    with pytest.raises(ParseError) as excinfo:
+        list(iter_s_exps(data, chunk_size=2))
+    assert str(excinfo.value) == expected_msg
+
+
+def test_parse_bytes_error_messages_match_parse_s_exp(unparseable_lll_file):
+    with open(unparseable_lll_file, 'rb') as f:
+        data = f.read()
+
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(data.decode('utf-8'))
+
+    with pytest.raises(ParseError) as excinfo:
+        parse_s_exp(data)
+
+    assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+def test_select_s_exps_selects_by_head_and_depth():
+    source_code = (
+        '(seq\n'
+        '  (def \'a 1) ; (def \'b 2)\n'
+        '  (when "(def" (def \'c 3))\n'
+        '  ((def \'d 4) 0x10)\n'
+        '  (def \'e (def \'f 5)))\n'
+    )
+
+    assert select_s_exps(source_code, lambda head, depth: head == 'def') == [
+        ['def', "'a", 1],
+        ['def', "'c", 3],
+        ['def', "'d", 4],
+        ['def', "'e", ['def', "'f", 5]],
+    ]
+    assert select_s_exps(source_code, lambda head, depth: head == 'def', max_depth=2) == [
+        ['def', "'a", 1],
+        ['def', "'e", ['def', "'f", 5]],
+    ]
+
+    heads = []
+
+    def predicate(head, depth):
+        heads.append((head, depth))
+        return False
+
+    assert select_s_exps(source_code, predicate) == []
+    assert heads == [
+        ('seq', 1),
+        ('def', 2),
+        ('when', 2),
+        ('def', 3),
+        (None, 2),
+        ('def', 3),
+        ('def', 2),
+        ('def', 3),
+    ]
+
+
+def test_select_s_exps_matches_parse_s_exp(parseable_lll_file):
+    with open(parseable_lll_file, 'r') as f:
+        source_code = f.read()
+
+    expected = [item for item in parse_s_exp(source_code) if isinstance(item, list)]
+
+    assert select_s_exps(source_code, lambda head, depth: True) == expected
+    assert select_s_exps(source_code.encode('utf-8'), lambda head, depth: True) == expected
+
+
+def test_select_s_exps_skips_deeply_nested_lists():
+    source_code = '(a ' + '(b "(" ' * 100 + ')' * 100 + ' (c 1))'
+
+    assert select_s_exps(source_code, lambda head, depth: head == 'c') == [['c', 1]]
+    assert select_s_exps(source_code, lambda head, depth: head == 'c', max_depth=1) == []
+
+
+@pytest.mark.parametrize(
+    'input',
+    (
+        '(a (b)',
+        '(a (b "c))',
+        '(a (b) ; c)',
+        '(a (b)))',
+        ')',
+        '(a (b ' * 100 + ')' * 99,
+    ),
+)
+def test_select_s_exps_error_messages(input):
+    with pytest.raises(ParseError) as expected_excinfo:
+        parse_s_exp(input)
+
+    for max_depth in (None, 1):
+        with pytest.raises(ParseError) as excinfo:
+            select_s_exps(input, lambda head, depth: head == 'b', max_depth=max_depth)
+        assert str(excinfo.value) == str(expected_excinfo.value)
+
+
+def test_select_s_exps_checks_only_selected_lists():
+    with pytest.raises(ParseError, match='invalid literal for int'):
+        select_s_exps('(a (b 0xg))', lambda head, depth: head == 'b')
+
+    assert select_s_exps('(a 0xg (b 1))', lambda head, depth: head == 'b') == [['b', 1]]
@@ -0,0 +1,122 @@
+import io
+
+import pytest
+
+from lll import (
+    printer,
+)
+from lll.parser import (
+    Symbol,
+    parse_s_exp,
+)
+from lll.printer import (
+    dump,
+    dumps,
+)
+
+
+@pytest.mark.parametrize('indent', (None, 0, 2))
+def test_dumps_round_trips(parseable_lll_file, indent):
+    with open(parseable_lll_file, 'r') as f:
+        s_exp = parse_s_exp(f)
+
+    assert parse_s_exp(dumps(s_exp, indent=indent)) == s_exp
+
+
+@pytest.mark.parametrize(
+    'input,expected',
+    (
+        ('', ''),
+        ('()', '()\n'),
+        ('foo 1 "bar"', 'foo\n1\n"bar"\n'),
+        ('(foo (bar -1)\n  ())', '(foo (bar -1) ())\n'),
+        ('(a)(b)', '(a)\n(b)\n'),
+        ('0x20 -0b11', '32\n-3\n'),
+    ),
+)
+def test_dumps_compact(input, expected):
+    assert dumps(parse_s_exp(input + '\n')) == expected
+
+
+def test_dumps_indented():
+    s_exp = parse_s_exp("(seq (def 'foo (x) (add x 0x01)) (foo 2) ((bar) baz))\n")
+
+    assert dumps(s_exp, indent=2) == (
+        "(seq (def 'foo (x) (add x 1)) (foo 2) ((bar) baz))\n"
+    )
+    assert dumps(s_exp, indent=2, width=20) == (
+        "(seq\n"
+        "  (def 'foo\n"
+        "    (x)\n"
+        "    (add x 1))\n"
+        "  (foo 2)\n"
+        "  ((bar) baz))\n"
+    )
+
+
+@pytest.mark.parametrize(
+    'value',
+    (
+        'foo',
+        '',
+        'a "quoted" string',
+        'back\\slash',
+        'new\nline',
+        'tab\tbed',
+        '\\n is not a newline',
+        '; (not code)',
+    ),
+)
+def test_dumps_escapes_strings(value):
+    assert parse_s_exp(dumps([value])) == [value]
+    assert '\n' not in dumps([value])[:-1]
+
+
+@pytest.mark.parametrize('symbol', ('', 'foo bar', 'foo(', 'a;b', 'a"b', '0x20', '-1'))
+def test_dumps_rejects_unprintable_symbols(symbol):
+    with pytest.raises(ValueError, match='symbol cannot be printed'):
+        dumps([Symbol(symbol)])
+
+
+def test_dumps_rejects_unsupported_items():
+    with pytest.raises(TypeError, match='unsupported s-expression item'):
+        dumps([1.5])
+
+
+@pytest.mark.parametrize('indent', (None, 1))
+def test_dumps_deeply_nested_lists(indent):
+    depth = 10000
+    source_code = '(seq ' * depth + '1' + ')' * depth + '\n'
+
+    output = dumps(parse_s_exp(source_code), indent=indent)
+
+    assert dumps(parse_s_exp(output)) == source_code
+
+
+def test_get_width_stops_at_max_width_in_nested_lists():
+    s_exp = []
+    for _ in range(10000):
+        s_exp = [s_exp]
+
+    encode = printer._make_atom_encoder()
+
+    assert printer._get_width(s_exp, encode, 80) == 81
+    assert printer._get_width([[1], [2]], encode, 80) == len('((1) (2))')
+
+
+def test_dump_writes_in_chunks(monkeypatch, get_fixture_contents):
+    monkeypatch.setattr(printer, 'WRITE_BUFFER_SIZE', 64)
+
+    s_exp = parse_s_exp(get_fixture_contents('ENS.lll.lisp'))
+    writes = []
+
+    class Stream(io.StringIO):
+        def write(self, s):
+            writes.append(s)
+            return super().write(s)
+
+    stream = Stream()
+    dump(s_exp, stream, indent=2)
+
+    assert len(writes) > 1
+    assert stream.getvalue() == dumps(s_exp, indent=2)
@@ -0,0 +1,215 @@
+import gc
+
+import pytest
+
+from lll import (
+    walk,
+)
+from lll.parser import (
+    Symbol,
+    parse_s_exp,
+)
+from lll.walk import (
+    Transformer,
+    Visitor,
+    iter_postorder,
+    iter_preorder,
+)
+
+
+SOURCE_CODE = "(seq (def 'foo 0x20) (when (foo) (set-owner 1 2)) \"str\")\n"
+
+DEPTH = 100000
+
+
+@pytest.fixture
+def deep_s_exp():
+    return parse_s_exp('(seq ' * DEPTH + '1' + ')' * DEPTH + '\n')
+
+
+def test_iter_preorder():
+    s_exp = parse_s_exp('(a (b c) d) e\n')
+
+    assert list(iter_preorder(s_exp)) == [
+        s_exp,
+        s_exp[0],
+        'a',
+        ['b', 'c'],
+        'b',
+        'c',
+        'd',
+        'e',
+    ]
+    assert list(iter_preorder(1)) == [1]
+
+
+def test_iter_postorder():
+    s_exp = parse_s_exp('(a (b c) d) e\n')
+
+    assert list(iter_postorder(s_exp)) == [
+        'a',
+        'b',
+        'c',
+        ['b', 'c'],
+        'd',
+        s_exp[0],
+        'e',
+        s_exp,
+    ]
+    assert list(iter_postorder(1)) == [1]
+
+
+def test_iterators_handle_deep_nesting(deep_s_exp):
+    assert sum(1 for _ in iter_preorder(deep_s_exp)) == 2 * DEPTH + 2
+    assert sum(1 for _ in iter_postorder(deep_s_exp)) == 2 * DEPTH + 2
+
+
+class RecordingVisitor(Visitor):
+    def __init__(self):
+        self.events = []
+
+    def visit_def(self, node):
+        self.events.append(('def', node[1]))
+
+    def visit_set_owner(self, node):
+        self.events.append(('set-owner', node[1:]))
+
+    def visit_when(self, node):
+        self.events.append('when')
+        # Skip the body
+        return False
+
+    def leave_seq(self, node):
+        self.events.append('leave seq')
+
+    def visit_list(self, node):
+        self.events.append(('list', len(node)))
+
+    def visit_atom(self, atom):
+        self.events.append(atom)
+
+
+def test_visitor_dispatches_on_head_symbol():
+    visitor = RecordingVisitor()
+    visitor.visit(parse_s_exp(SOURCE_CODE))
+
+    assert visitor.events == [
+        ('list', 1),
+        ('list', 4),
+        'seq',
+        ('def', "'foo"),
+        'def',
+        "'foo",
+        32,
+        'when',
+        'str',
+        'leave seq',
+    ]
+
+
+def test_visitor_dispatches_dashed_symbols():
+    visitor = RecordingVisitor()
+    visitor.visit(parse_s_exp('(set-owner 1 2)\n')[0])
+
+    assert visitor.events[0] == ('set-owner', [1, 2])
+
+
+def test_generic_handlers_are_not_used_for_head_symbols():
+    calls = []
+
+    class Recorder(Visitor):
+        def visit_list(self, node):
+            calls.append(('list', node))
+
+        def visit_atom(self, atom):
+            calls.append(('atom', atom))
+
+    s_exp = parse_s_exp('(atom x)')
+    Recorder().visit(s_exp[0])
+
+    assert calls == [('list', s_exp[0]), ('atom', 'atom'), ('atom', 'x')]
+
+    class Replacer(Transformer):
+        def transform_atom(self, atom):
+            return 1 if atom == 'x' else atom
+
+    assert Replacer().transform(s_exp) == [['atom', 1]]
+
+
+def test_handler_lookups_do_not_grow_with_head_symbols():
+    class Counter(Visitor):
+        def __init__(self):
+            self.count = 0
+
+        def visit_list(self, node):
+            self.count += 1
+
+    counter = Counter()
+    counter.visit(parse_s_exp(' '.join(f'(head-{i} 1)' for i in range(1000))))
+
+    assert counter.count == 1001
+    assert len(walk._handler_tables[Counter]['visit_']) == 1
+
+    del Counter, counter
+    gc.collect()
+
+    assert all(cls.__name__ != 'Counter' for cls in walk._handler_tables)
+
+
+def test_visitor_handles_deep_nesting(deep_s_exp):
+    class CountingVisitor(Visitor):
+        count = 0
+
+        def visit_seq(self, node):
+            self.count += 1
+
+    visitor = CountingVisitor()
+    visitor.visit(deep_s_exp)
+
+    assert visitor.count == DEPTH
+
+
+class DoublingTransformer(Transformer):
+    def transform_atom(self, atom):
+        if isinstance(atom, int):
+            return atom * 2
+        return atom
+
+    def transform_when(self, node):
+        return [Symbol('if')] + node[1:]
+
+
+def test_transformer_rebuilds_changed_subtrees():
+    s_exp = parse_s_exp(SOURCE_CODE)
+    original = parse_s_exp(SOURCE_CODE)
+
+    result = DoublingTransformer().transform(s_exp)
+
+    assert result == [[
+        'seq',
+        ['def', "'foo", 64],
+        ['if', ['foo'], ['set-owner', 2, 4]],
+        'str',
+    ]]
+
+    # Unchanged subtrees are shared and the original is not modified
+    assert result[0][2][1] is s_exp[0][2][1]
+    assert s_exp == original
+
+
+def test_transformer_returns_unchanged_tree():
+    s_exp = parse_s_exp("(seq (def 'foo bar))\n")
+
+    assert Transformer().transform(s_exp) is s_exp
+    assert Transformer().transform(1) == 1
+
+
+def test_transformer_handles_deep_nesting(deep_s_exp):
+    result = DoublingTransformer().transform(deep_s_exp)
+
+    # The top-level list holds the outermost seq
+    node = result
+    for _ in range(DEPTH + 1):
+        node = node[-1]
+
+    assert node == 2
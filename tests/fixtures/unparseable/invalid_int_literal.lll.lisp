@@ -0,0 +1,2 @@
+(seq
+  (def 'foo 0xxff))
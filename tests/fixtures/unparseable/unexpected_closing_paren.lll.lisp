@@ -0,0 +1,3 @@
+(seq
+  (foo bar))
+  baz)